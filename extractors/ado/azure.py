@@ -3,12 +3,16 @@ import time
 
 from datetime import datetime, timedelta, date
 from typing import Optional
+from urllib.parse import quote
 
 import requests
 import pandas as pd
 
 from ..ado.azure_base import AzureBase
+from ..ado.azure_revisions import REVISIONS_FIELDS, WorkItemRevisionsStore, get_revisions_store, history_from_revisions
 from ..ado.utils import repeat_request
+from ..utils.cache import get_cache, get_many_or_load, get_or_load, load_each
+from ..utils.concurrency import run_concurrently
 from ..utils.transform import waiting_time_for_jobs_in_pipeline
 from ..utils.convert_to_datetime import string_to_datetime
 from ..utils.constants import OUTPUT_FOLDER
@@ -35,6 +39,24 @@ PIPELINES_COLUMN_MAPPING = {
 }
 
 
+BUILDS_RUNS_COLUMN_MAPPING = {
+    'status': 'run_state',
+    'result': 'run_result',
+    'queueTime': 'run_created_date',
+    'finishTime': 'run_finished_date',
+    'url': 'run_url',
+    'id': 'run_id',
+    'buildNumber': 'run_name',
+    '_links.self.href': '_links_self_href',
+    '_links.web.href': '_links_web_href',
+    'definition.url': 'pipeline_url',
+    'definition.id': 'pipeline_id',
+    'definition.revision': 'pipeline_revision',
+    'definition.name': 'pipeline_name',
+    'definition.path': 'pipeline_folder'
+}
+
+
 BUILDS_COLUMN_MAPPING = {
     'id': 'job_id',
     'type': 'job_type',
@@ -152,7 +174,8 @@ class AzureDevOps(AzureBase):  # pylint: disable=too-many-public-methods
         if self.token is not None:
             kwargs['auth'] = (self.user, self.token)
         try:
-            response = requests.post(request_url, **kwargs)  # pylint: disable=missing-timeout
+            with self.budget:
+                response = self.session.post(request_url, **kwargs)  # pylint: disable=missing-timeout
         except requests.exceptions.RequestException as err:
             print('Oops: something went wrong while sending POST request:', err)
             raise
@@ -287,9 +310,14 @@ class AzureDevOps(AzureBase):  # pylint: disable=too-many-public-methods
             return df
         return pd.DataFrame()
 
-    def concat_work_items_and_history(self, resolved_after: str, updated_after: str, created_after: str, area: str) -> \
-            tuple[pd.DataFrame, pd.DataFrame]:
-        """Concatenate work items with history."""
+    def concat_work_items_and_history(  # pylint: disable=too-many-arguments
+            self, resolved_after: str, updated_after: str, created_after: str, area: str,
+            incremental: bool = False) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Concatenate work items with history.
+        In the incremental mode history is derived from the local store of revisions synchronized with
+        the reporting revisions API instead of requesting updates of every work item.
+        """
         df_wi_info = self.work_items_and_info(resolved_after, updated_after, created_after, area)
         if df_wi_info.empty:
             return df_wi_info, df_wi_info
@@ -300,7 +328,7 @@ class AzureDevOps(AzureBase):  # pylint: disable=too-many-public-methods
             df_history[['status_history', 'from_time', 'to_time', 'time_in_status']] = None
             return df_history, pd.DataFrame()
 
-        df_history = self.process_history(ids)
+        df_history = self.process_history_from_revisions(ids) if incremental else self.process_history(ids)
         df_wi_history = df_wi_info.merge(df_history, on='issue_id', how='left')
         df_statuses = statuses_order_jira(df_wi_history)
         df_wi_history = df_wi_history.drop(['cum_count'], axis=1)
@@ -319,6 +347,38 @@ class AzureDevOps(AzureBase):  # pylint: disable=too-many-public-methods
         df_history['cum_count'] = df_history.sort_values(by=['issue_id', 'from_date']).groupby(['issue_id']).cumcount()
         return df_history
 
+    def process_history_from_revisions(self, ids: list) -> pd.DataFrame:
+        """Process histories from the local store of revisions after synchronizing it."""
+        store = self.sync_work_items_revisions()
+        df_history = history_from_revisions(store.get_revisions([item[0] for item in ids]), ids)
+        df_history['cum_count'] = df_history.sort_values(by=['issue_id', 'from_date']).groupby(['issue_id']).cumcount()
+        return df_history
+
+    def sync_work_items_revisions(self) -> WorkItemRevisionsStore:
+        """
+        Download work items revisions made since the last synchronization (all revisions for the first one)
+        and apply them to the local store of the project.
+        Details on a page:
+        https://learn.microsoft.com/en-us/rest/api/azure/devops/wit/reporting-work-item-revisions/read-reporting-revisions-get
+        """
+        store = get_revisions_store(self.organization, self.project_id)
+        request_url = (f'https://dev.azure.com/{self.organization}/{self.project_id}/_apis/wit/reporting/'
+                       f'workitemrevisions?fields={",".join(REVISIONS_FIELDS)}&$maxPageSize=1000&api-version=6.0')
+        count = 0
+        with store.sync_lock:
+            watermark = store.get_watermark()
+            while True:
+                url = f'{request_url}&continuationToken={quote(watermark)}' if watermark else request_url
+                data = self.make_get_request(url).json()
+                revisions = data.get('values', [])
+                watermark = data.get('continuationToken')
+                store.add_revisions(revisions, watermark)
+                count += len(revisions)
+                if data.get('isLastBatch', True):
+                    break
+        print(f'{count} work items revisions have been synchronized in the project {self.project_id}')
+        return store
+
     def get_work_items_update(self, work_item_id: list) -> list[list]:
         """
         Get history of statuses transitions for a single work item.
@@ -390,36 +450,19 @@ class AzureDevOps(AzureBase):  # pylint: disable=too-many-public-methods
         response = self.make_get_request(request_url)
         return response.json()
 
-    def get_associated_commits_to_pr(self, repos_id, pull_request_id) -> Optional[pd.DataFrame]:
-        """
-        Get associated pull request commits.
-        Doesn't return system commits/
-        Details on the page:
-        https://docs.microsoft.com/en-us/rest/api/azure/devops/git/pull-request-commits/get-pull-request-commits
-        """
-        request_url = (f'https://dev.azure.com/{self.organization}/{self.project_id}/_apis/git/repositories/{repos_id}/'
-                       f'pullRequests/{pull_request_id}/commits?api-version=6.0')
-        response = self.make_get_request(request_url)
-        try:
-            data = response.json()['value']
-            df_commits = pd.json_normalize(data)
-            return df_commits.loc[:, ['author.date', 'comment', 'commitId']]
-        except KeyError:
-            return None
-
-    def get_all_pull_requests_details(self, since_date: str, skip: int = 0) -> Optional[pd.DataFrame]:
+    def get_all_pull_requests_details(self, since_date: str) -> Optional[pd.DataFrame]:
         """
         Get and process.
         Details on a page:
         https://docs.microsoft.com/en-us/rest/api/azure/devops/git/pull-requests/get-pull-requests-by-project
         """
-        df_pr_data = self._get_pull_requests_data(skip)
+        repos_ids = self.get_repos()
+        df_pr_data = self._get_pull_requests_data(repos_ids, since_date)
         if df_pr_data.empty:
             return None
         df_pr_data['creationDate_formatted'] = df_pr_data['creationDate'].str.split('T', expand=True)[0]
         df_pr_data = df_pr_data[df_pr_data['creationDate_formatted'] >= since_date]
         df_pull_requests = self._adapt_df_to_github(df_pr_data)
-        repos_ids = self.get_repos()
         df_pull_requests = self._add_commit_dates(repos_ids, df_pr_data, df_pull_requests)
         df_pull_requests = df_pull_requests.reset_index(level=0)
         df_pull_requests.rename(columns={'creationDate': 'created_at',
@@ -436,21 +479,36 @@ class AzureDevOps(AzureBase):  # pylint: disable=too-many-public-methods
         print("Pull requests data has been downloaded to the folder 'raw_data'")
         return df_pull_requests
 
-    def _get_pull_requests_data(self, skip: int) -> pd.DataFrame:
-        """Gather data of all pull requests."""
+    def _get_pull_requests_data(self, repos_ids: dict, since_date: str) -> pd.DataFrame:
+        """Gather data of pull requests created since the date, querying repositories concurrently."""
+        data = run_concurrently(lambda repos_id: self._get_repo_pull_requests_data(repos_id, since_date), repos_ids)
+        return pd.json_normalize([pull_request for data_one_repo in data for pull_request in data_one_repo])
+
+    def _get_repo_pull_requests_data(self, repos_id: str, since_date: str, top: int = 200) -> list[dict]:
+        """
+        Gather data of pull requests of one repository.
+        Pull requests are returned from the newest to the oldest one, so paging stops at the first page
+        that reaches back before since_date.
+        Details on a page:
+        https://docs.microsoft.com/en-us/rest/api/azure/devops/git/pull-requests/get-pull-requests
+        """
         data = []
-        count = True
-        while count:
-            request_url = (f'https://dev.azure.com/{self.organization}/{self.project_id}/'
-                           f'_apis/git/pullrequests?searchCriteria.status=all&$skip={skip}&$top=200'
+        skip = 0
+        while True:
+            request_url = (f'https://dev.azure.com/{self.organization}/{self.project_id}/_apis/git/repositories/'
+                           f'{repos_id}/pullrequests?searchCriteria.status=all&$skip={skip}&$top={top}'
                            f'&api-version=6.0')
-            response = self.make_get_request(request_url)
-            data_unit = response.json().get('value')
-            if data_unit:
-                data += data_unit
-            count = response.json().get('count')
-            skip += 200
-        return pd.json_normalize(data)
+            try:
+                response = self.make_get_request(request_url)
+            except requests.exceptions.HTTPError as err:
+                print(f'Pull requests of the repository "{repos_id}" are not available:', err)
+                break
+            data_unit = response.json().get('value') or []
+            data += data_unit
+            if len(data_unit) < top or min(item['creationDate'][:10] for item in data_unit) < since_date:
+                break
+            skip += top
+        return data
 
     @staticmethod
     def _adapt_df_to_github(df_pr_data: pd.DataFrame) -> pd.DataFrame:
@@ -475,76 +533,42 @@ class AzureDevOps(AzureBase):  # pylint: disable=too-many-public-methods
         df_pull_requests['last_commit_date'] = None
         return df_pull_requests
 
-    def _add_commit_dates(
-            self, repos_ids: dict, df_pr_data: pd.DataFrame, df_pull_requests: pd.DataFrame) -> pd.DataFrame:
-        """Add first and last commits dates."""
-        for repos_id in repos_ids:
-            merge_req_ids = df_pr_data[df_pr_data['repository.id'] == repos_id]['pullRequestId'].to_list()
-            for merge_req_id in merge_req_ids:
-                merge_req_commits_df = self.get_associated_commits_to_pr(repos_id, merge_req_id)
-                if merge_req_commits_df is None:
-                    print("empty df")
-                else:
-                    if len(merge_req_commits_df) == 1:
-                        commit_min_date = merge_req_commits_df['author.date'].min()
-                        df_pull_requests.at[merge_req_id, 'first_commit_date'] = commit_min_date
-                    else:
-                        commit_min_date = merge_req_commits_df['author.date'].min()
-                        commit_max_date = merge_req_commits_df['author.date'].max()
-                        df_pull_requests.at[merge_req_id, 'first_commit_date'] = commit_min_date
-                        df_pull_requests.at[merge_req_id, 'last_commit_date'] = commit_max_date
-        return df_pull_requests
-
-    def get_pipelines(self) -> dict:
+    def get_pull_request_commit_dates(self, repos_id: str, pull_request_id: int) -> \
+            tuple[Optional[str], Optional[str]]:
         """
-        Get pipelines.
-        Details on the page: https://docs.microsoft.com/en-us/rest/api/azure/devops/pipelines/pipelines/list
+        Get dates of the first and the last commits of a pull request. The last date is None for a single commit.
+        Details on the page:
+        https://docs.microsoft.com/en-us/rest/api/azure/devops/git/pull-request-commits/get-pull-request-commits
         """
-        data = []
-        request_url = (f'https://dev.azure.com/{self.organization}/{self.project_id}/'
-                       f'_apis/pipelines?$top=100&&api-version=6.0-preview.1')
-        while True:
-            response = self.make_get_request(request_url)
-            continuation_token = response.headers.get('x-ms-continuationtoken')
-            request_url = (f'https://dev.azure.com/{self.organization}/{self.project_id}/'
-                           f'_apis/pipelines?$top=100&continuationToken={continuation_token}'
-                           f'&api-version=6.0-preview.1')
-            value = response.json().get('value')
-            if value:
-                data += value
-            if not continuation_token:
-                break
-        return {pipeline['id']: [pipeline['name'], self.project_id] for pipeline in data}
+        request_url = (f'https://dev.azure.com/{self.organization}/{self.project_id}/_apis/git/repositories/{repos_id}/'
+                       f'pullRequests/{pull_request_id}/commits?api-version=6.0')
+        response = self.make_get_request(request_url)
+        dates = [commit['author']['date'] for commit in response.json().get('value', []) if 'author' in commit]
+        if not dates:
+            return None, None
+        return min(dates), max(dates) if len(dates) > 1 else None
 
-    def get_pipelines_runs(self, pipeline_id: str) -> Optional[pd.DataFrame]:
+    def _add_commit_dates(
+            self, repos_ids: dict, df_pr_data: pd.DataFrame, df_pull_requests: pd.DataFrame) -> pd.DataFrame:
         """
-        Retrieve pipeline runs from Azure DevOps and returns a DataFrame containing the pipeline runs data.
-        Details on the page: https://docs.microsoft.com/en-us/rest/api/azure/devops/pipelines/runs/list
+        Add first and last commits dates. Dates of completed pull requests never change, so they are kept in
+        a persistent cache and requested only once.
         """
-        request_url = (f'https://dev.azure.com/{self.organization}/{self.project_id}/'
-                       f'_apis/pipelines/{pipeline_id}/runs/?api-version=6.0-preview.1')
-        response = self.make_get_request(request_url)
-        data = response.json().get('value')
-        if data is None:
-            print(f"There is no runs for the pipeline id {pipeline_id}")
-            return None
-        df_pipelines = pd.json_normalize(data)
-        df_pipelines = df_pipelines[PIPELINES_COLUMN_MAPPING.keys()]
-        df_pipelines = df_pipelines.rename(columns=PIPELINES_COLUMN_MAPPING)
-        return df_pipelines
-
-    def get_pipelines_and_runs(self) -> pd.DataFrame:
-        """Retrieves pipeline data and their respective run data and merges it into a single DataFrame."""
-        pipelines_dict = self.get_pipelines()
-        all_data = []
-
-        for pipeline_id, (_, project_name) in pipelines_dict.items():
-            run_data = self.get_pipelines_runs(pipeline_id)
-            if run_data is not None:
-                run_data['project_name'] = project_name
-                all_data.append(run_data)
-
-        return pd.concat(all_data, ignore_index=True) if all_data else pd.DataFrame()
+        df_prs = df_pr_data[df_pr_data['repository.id'].isin(repos_ids)]
+        if df_prs.empty:
+            return df_pull_requests
+        repos_ids_by_pr = dict(zip(df_prs['pullRequestId'], df_prs['repository.id']))
+        keys = {pr_id: f'{self.organization}/{repos_id}/{pr_id}' for pr_id, repos_id in repos_ids_by_pr.items()}
+        completed = set(df_prs.loc[df_prs['status'] == 'completed', 'pullRequestId'])
+        commit_dates = get_many_or_load(
+            get_cache('ado_pull_request_commit_dates'), keys,
+            load_each(lambda pr_id: list(self.get_pull_request_commit_dates(repos_ids_by_pr[pr_id], pr_id))),
+            keep=lambda pr_id, _: pr_id in completed)
+
+        df_dates = pd.DataFrame([[pr_id, *commit_dates[pr_id]] for pr_id in keys],
+                                columns=['pullRequestId', 'first_commit_date', 'last_commit_date'])
+        df_pull_requests.update(df_dates.set_index('pullRequestId'))
+        return df_pull_requests
 
     def get_builds(self) -> tuple[list, pd.DataFrame]:
         """
@@ -561,34 +585,69 @@ class AzureDevOps(AzureBase):  # pylint: disable=too-many-public-methods
         df_builds = df_builds.rename(columns={'id': 'build_id'})
         return builds_ids, df_builds
 
-    def get_timeline(self, build_id: str) -> Optional[pd.DataFrame]:
-        """Function to get the timeline details of a specific build id."""
+    def get_builds_runs(self, since_date: Optional[str] = None) -> pd.DataFrame:
+        """
+        Get pipelines runs queued since the date (all runs if the date is not set) as builds of the project.
+        Details on the page: https://docs.microsoft.com/en-us/rest/api/azure/devops/build/builds/list
+        """
+        request_url = (f'https://dev.azure.com/{self.organization}/{self.project_id}/_apis/build/builds?'
+                       f'queryOrder=queueTimeDescending&$top=1000&api-version=6.0')
+        if since_date:
+            request_url += f'&minTime={since_date}'
+        data = []
+        continuation_token = None
+        while True:
+            url = f'{request_url}&continuationToken={quote(continuation_token)}' if continuation_token else request_url
+            response = self.make_get_request(url)
+            data += response.json().get('value') or []
+            continuation_token = response.headers.get('x-ms-continuationtoken')
+            if not continuation_token:
+                break
+        if not data:
+            return pd.DataFrame()
+        df_runs = pd.json_normalize(data).reindex(columns=list(BUILDS_RUNS_COLUMN_MAPPING.keys()))
+        df_runs = df_runs.rename(columns=BUILDS_RUNS_COLUMN_MAPPING)
+        # Builds refer to their pipeline definition instead of pipeline links
+        df_runs['_links_pipeline_web_href'] = (f'https://dev.azure.com/{self.organization}/{self.project_id}/'
+                                               f'_build?definitionId=') + df_runs['pipeline_id'].astype(str)
+        df_runs['_links_pipeline_href'] = df_runs['pipeline_url']
+        df_runs = df_runs[list(PIPELINES_COLUMN_MAPPING.values())]
+        df_runs['project_name'] = self.project_id
+        return df_runs
+
+    def _get_timeline_records(self, build_id: str) -> Optional[list[dict]]:
+        """Get timeline records of a build keeping only necessary fields."""
         request_url = (f'https://dev.azure.com/{self.organization}/{self.project_id}/'
                        f'_apis/build/builds/{build_id}/timeline?api-version=6.0')
         response = self.make_get_request(request_url)
-        data = response.json().get('records')
+        data = response.json().get('records') if response.content else None
         if data is None:
             print(f'There are no records for build "{build_id}"')
             return None
-        df_timeline = pd.json_normalize(data)
-        # Keep only necessary columns
-        df_timeline = df_timeline[BUILDS_COLUMN_MAPPING.keys()]
-        df_timeline = df_timeline.rename(columns=BUILDS_COLUMN_MAPPING)
-        return df_timeline
-
-    def get_pipelines_runs_and_timeline(self, to_save) -> Optional[pd.DataFrame]:
-        """Get pipelines and run timelines."""
-        pipelines_runs = self.get_pipelines_and_runs()
+        return [{key: record.get(key) for key in BUILDS_COLUMN_MAPPING} for record in data]
+
+    def get_timelines(self, pipelines_runs: pd.DataFrame) -> pd.DataFrame:
+        """
+        Get timelines of pipelines runs concurrently.
+        Timelines of completed runs never change, so they are kept in a persistent cache by run id.
+        """
+        keys = {run_id: f'{self.organization}/{self.project_id}/{run_id}' for run_id in pipelines_runs['run_id']}
+        completed = set(pipelines_runs.loc[pipelines_runs['run_state'] == 'completed', 'run_id'])
+        timelines = get_many_or_load(get_cache('ado_pipeline_run_timelines'), keys,
+                                     load_each(self._get_timeline_records),
+                                     keep=lambda run_id, records: run_id in completed and records is not None)
+
+        records = [dict(record, run_id=run_id) for run_id in keys for record in timelines[run_id] or []]
+        df_timeline = pd.DataFrame.from_records(records, columns=list(BUILDS_COLUMN_MAPPING.keys()) + ['run_id'])
+        return df_timeline.rename(columns=BUILDS_COLUMN_MAPPING)
+
+    def get_pipelines_runs_and_timeline(self, to_save, since_date: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """Get pipelines runs queued since the date and their timelines."""
+        pipelines_runs = self.get_builds_runs(since_date)
         if pipelines_runs.empty:
             print("There are no pipelines runs")
             return None
-        run_ids = pipelines_runs['run_id'].to_list()
-        timeline_df = pd.DataFrame()
-        for run in run_ids:
-            df_timeline = self.get_timeline(run)
-            if df_timeline is not None:
-                df_timeline['run_id'] = run
-                timeline_df = pd.concat([timeline_df, df_timeline])
+        timeline_df = self.get_timelines(pipelines_runs)
         runs_details_df = pipelines_runs.merge(timeline_df, how='outer', on='run_id')
         runs_details_df = runs_details_df[runs_details_df['job_type'] == 'Job']
         runs_details_df = runs_details_df.rename(columns={'name_y': 'job name', 'state_y': 'job state',
@@ -621,30 +680,40 @@ class AzureDevOps(AzureBase):  # pylint: disable=too-many-public-methods
             return pd.DataFrame()
 
     def get_iterations(self) -> Optional[pd.DataFrame]:
-        """Get iterations (sprints).
+        """Get iterations (sprints) of all teams of the project. Teams are requested concurrently.
         Details on a page: https://docs.microsoft.com/en-us/rest/api/azure/devops/work/iterations/list.
         """
         teams_lst = self.get_teams()
         if not teams_lst:
             return None
 
-        iterations_df = pd.DataFrame()
-        for team in teams_lst:
-            if team:
-                request_url = (f'https://dev.azure.com/{self.organization}/{self.project_id}/{team}/'
-                               f'_apis/work/teamsettings/iterations?api-version=6.0')
-                response = self.make_get_request(request_url)
-                data = response.json().get('value')
-                if data:
-                    next_df = pd.json_normalize(data)
-                    next_df['team'] = team
-                    iterations_df = pd.concat([iterations_df, next_df], ignore_index=True)
-        return iterations_df
+        teams_lst = [team for team in teams_lst if team]
+        iterations = []
+        for team, team_iterations in zip(teams_lst, run_concurrently(self.get_team_iterations, teams_lst)):
+            iterations.extend(dict(iteration, team=team) for iteration in team_iterations)
+        return pd.json_normalize(iterations) if iterations else pd.DataFrame()
+
+    def get_team_iterations(self, team: str) -> list[dict]:
+        """Get iterations of a team. Iterations are kept in the organization metadata cache
+        as past iterations do not change and current ones are changed rarely."""
+        return get_or_load(get_cache('ado_metadata'), self.metadata_key(f'iterations/{team}'),
+                           lambda: self._load_team_iterations(team))
+
+    def _load_team_iterations(self, team: str) -> list[dict]:
+        """Request iterations of a team."""
+        request_url = (f'https://dev.azure.com/{self.organization}/{self.project_id}/{team}/'
+                       f'_apis/work/teamsettings/iterations?api-version=6.0')
+        response = self.make_get_request(request_url)
+        return response.json().get('value') or []
 
     def get_teams(self) -> list:
-        """Get teams list.
+        """Get teams list. The list is kept in the organization metadata cache.
         Details on a page: https://docs.microsoft.com/en-us/rest/api/azure/devops/core/teams/get-teams.
         """
+        return get_or_load(get_cache('ado_metadata'), self.metadata_key('teams'), self._load_teams)
+
+    def _load_teams(self) -> list:
+        """Request ids of all teams of the project."""
         request_url = (f'https://dev.azure.com/{self.organization}/_apis/projects/{self.project_id}/'
                        f'teams?api-version=6.0')
         response = self.make_get_request(request_url)
@@ -1,8 +1,9 @@
 """This module contains the base class for Azure DevOps API."""
 import requests
 
-from ..ado.utils import repeat_request
+from ..ado.utils import repeat_request, get_organization_resources
 from ..utils import exceptions
+from ..utils.cache import get_cache, get_or_load
 
 
 class AzureBase:
@@ -13,14 +14,22 @@ class AzureBase:
         self.user = user
         self.token = token
         self.response_code_handler = exceptions.ResponseCodeHandler(project_id)
-        self.session = requests.Session()
+        self.session, self.budget = get_organization_resources(organization, user, token)
         self.df = None
+        self._repos = None
 
     def get_repos(self):
         """Get all repositories.
         Details on a page:
         https://docs.microsoft.com/en-us/rest/api/azure/devops/git/repositories/list?view=azure-devops-rest-4.1
+        The list is kept in the organization metadata cache.
         """
+        if self._repos is None:
+            self._repos = get_or_load(get_cache('ado_metadata'), self.metadata_key('repos'), self._load_repos)
+        return self._repos
+
+    def _load_repos(self) -> dict:
+        """Request all repositories of the project."""
         request_url = (f"https://dev.azure.com/{self.organization}/{self.project_id}/"
                        f"_apis/git/repositories?api - version = 6.0")
         response = self.make_get_request(request_url)
@@ -30,6 +39,10 @@ class AzureBase:
             repos_dict[repo['id']] = [repo['name'], repo['remoteUrl']]
         return repos_dict
 
+    def metadata_key(self, name: str) -> str:
+        """Key of the project metadata in the cache. Metadata depends on the user's access rights."""
+        return f'{self.organization}/{self.user}/{self.project_id}/{name}'
+
     @repeat_request(repeat_num=10)
     def make_get_request(self, request_url: str):
         """Make a GET request to Azure DevOps API."""
@@ -37,7 +50,8 @@ class AzureBase:
         if self.token is not None:
             kwargs['auth'] = (self.user, self.token)
         try:
-            response = self.session.get(request_url, **kwargs)
+            with self.budget:
+                response = self.session.get(request_url, **kwargs)
         except requests.exceptions.RequestException as err:
             print('Oops: something went wrong while sending GET request:', err)
             raise
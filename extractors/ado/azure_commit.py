@@ -1,17 +1,18 @@
 """Module to work with Azure DevOps' commits."""
 
 import asyncio
-import codecs
 import os
-import subprocess
 
 from typing import Optional
 
-import aiohttp
 import pandas as pd
+import requests
 
 from ..ado.azure_base import AzureBase
-from ..utils.constants import OUTPUT_FOLDER
+from ..ado.utils import ORGANIZATION_CONCURRENCY
+from ..utils.cache import CACHE_FOLDER
+from ..utils.concurrency import run_concurrently
+from ..utils.git_commit_size import basic_auth_header, get_commits_sizes_for_repos
 
 
 class AzureDevOpsCommit(AzureBase):
@@ -20,8 +21,8 @@ class AzureDevOpsCommit(AzureBase):
         """Get commits details on a page:
         https://docs.microsoft.com/ru-ru/rest/api/azure/devops/git/commits/get-commits?view=azure-devops-rest-6.0#all-commits
         """
-        repos = self.get_repos()
-        self.df = self._get_commits(repos, since_date)
+        repos = await asyncio.to_thread(self.get_repos)
+        self.df = await asyncio.to_thread(self._get_commits, repos, since_date)
         if self.df.empty:
             return None
         self._filter_out_service_commits()
@@ -62,105 +63,56 @@ class AzureDevOpsCommit(AzureBase):
                        inplace=True)
 
     async def _add_commit_sizes(self):
-        async with aiohttp.ClientSession() as session:
-            self.session = session
-            tasks = self._generate_tasks()
-            dicts = await asyncio.gather(*tasks)
-        df_with_sizes = pd.DataFrame(dicts)
-        self.df = pd.merge(self.df, df_with_sizes, on='id')
-
-    def _generate_tasks(self) -> list:
-        return [asyncio.create_task(self._get_commit_size(row)) for _, row in self.df.iterrows()]
-
-    async def _get_commit_size(self, row: pd.Series):
-        response = await self._make_async_request(row)
-        return await self._transform_to_commit_size(response, row['id'])
+        """
+        Add sizes of commits. Requests go through the pooled session of the organization and its concurrency
+        budget, so they are bounded together with requests of all other projects.
+        """
+        rows = list(zip(self.df['repos_name'], self.df['id']))
+        sizes = await asyncio.to_thread(run_concurrently, self._get_commit_size, rows, ORGANIZATION_CONCURRENCY)
+        df_with_sizes = pd.DataFrame({'id': self.df['id'].tolist(), 'commit_size': sizes})
+        self.df = pd.merge(self.df, df_with_sizes.drop_duplicates('id'), on='id')
 
-    async def _make_async_request(self, row: pd.Series):
+    def _get_commit_size(self, row: tuple[str, str]) -> Optional[int]:
+        """
+        Get size of a commit as the number of changed files.
+        Details on the page: https://learn.microsoft.com/en-us/rest/api/azure/devops/git/commits/get-changes
+        """
+        repos_name, commit_id = row
         request_url = (f'https://dev.azure.com/{self.organization}/{self.project_id}/_apis/git/repositories/'
-                       f'{row["repos_name"]}/commits/{row["id"]}/changes?api-version=7.0')
-        if self.token is None:
-            return await self.session.get(request_url)
-        return await self.session.get(request_url, auth=aiohttp.BasicAuth(self.user, self.token))
-
-    @staticmethod
-    async def _transform_to_commit_size(response: aiohttp.client, commit_id: str) -> dict:
-        data = await response.json()
-        return {'id': commit_id, 'commit_size': sum(data['changeCounts'].values())}
+                       f'{repos_name}/commits/{commit_id}/changes?api-version=7.0')
+        try:
+            response = self.make_get_request(request_url)
+        except requests.exceptions.HTTPError as err:
+            print(f'Failed to get the size of the commit "{commit_id}":', err)
+            return None
+        return sum(response.json().get('changeCounts', {}).values())
 
-    async def get_commits_details_and_size(self, since_date):
-        """Get commits details and sizes."""
+    async def get_commits_details_and_size(self, since_date: str) -> Optional[pd.DataFrame]:
+        """Get commits details and sizes calculated from local mirrors of the repositories."""
         df_commits = await self.get_commits_details(since_date, with_commit_size=False)
-        commits_size = []
+        if df_commits is None:
+            return None
         # Get info on commits size
-        repos_name_lst = df_commits['repos_name'].drop_duplicates().to_list()
-        for repo in repos_name_lst:
-            commits_size_one_repo = self.run_shell(repo)
-            commits_size += commits_size_one_repo
+        repos_names = set(df_commits['repos_name'])
+        mirrors = {self._get_mirror_path(name): remote_url
+                   for name, remote_url in self.get_repos().values() if name in repos_names}
+        auth_header = basic_auth_header(self.user, self.token) if self.token is not None else None
+        commits_size = await asyncio.to_thread(get_commits_sizes_for_repos, mirrors, since_date, auth_header)
 
         commits_size_df = pd.DataFrame(commits_size, columns=['id', 'commit_size'])
+        repos_with_sizes = set(df_commits.loc[df_commits['id'].isin(commits_size_df['id']), 'repos_name'])
+        for repos_name in sorted(repos_names - repos_with_sizes):
+            print(f'Warning: no commits sizes for the repository "{repos_name}" of the project {self.project_id}, '
+                  f'its commits are left out')
         upper_bound = self.outliers(commits_size_df['commit_size'])
         df_commits_with_sizes = df_commits.merge(commits_size_df, on='id')
         df_commits_with_sizes['upperBound'] = upper_bound
         print("Commits data has been downloaded to the folder 'raw_data'")
         return df_commits_with_sizes
 
-    @staticmethod
-    def run_shell(repos: str) -> list[str]:
-        """Get commits size using shell command diff. Repos should be cloned to the folder raw_data."""
-
-        def extract_commits(path: str) -> list[str]:
-            with codecs.open(path, "r", "utf_8_sig") as file:
-                return [line.split(' ')[0] for line in file]
-
-        def execute_cmd(cmd: str) -> tuple[bytes, bytes]:
-            with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as process:
-                out, err = process.communicate()
-            return out, err
-
-        def calcualte_commit_size(commit: bytes) -> Optional[int]:
-            lst_numbers = [int(str_) for str_ in commit.decode('utf-8').split() if str_.isdigit()]
-            if len(lst_numbers) == 2:
-                return lst_numbers[1]
-            if len(lst_numbers) == 3:
-                return lst_numbers[1] + lst_numbers[2]
-            return None
-
-        try:
-            os.chdir(os.path.join(os.path.dirname(os.path.realpath(__file__)), OUTPUT_FOLDER + repos))
-        except FileNotFoundError:
-            print(f'Clone the repos "{repos}" first')
-            return []
-        os.system('git pull')
-        os.system('git log --format=oneline > log.txt')  # Get actual list of commits
-        commits_lst = extract_commits("../log.txt")
-        bad_commits = []
-        prev_commits_length = 0
-        while prev_commits_length != len(commits_lst):
-            commits_size_one_repos = []
-            # Loop through commits list and get commits size
-            for index, commit in enumerate(commits_lst):
-                parent_commit, _ = execute_cmd(f'git log --pretty=%P -n 1 {commit}')
-                if len(parent_commit) > 42:
-                    continue
-                if len(parent_commit) < 41:
-                    cmd = f"git diff '4b825dc642cb6eb9a060e54bf8d69288fbee4904' {commits_lst[index]} --shortstat"
-                else:
-                    parent_commit = parent_commit.decode('utf-8')[:40]
-                    cmd = f"git diff {commits_lst[index]} {parent_commit} --shortstat"
-
-                out, err = execute_cmd(cmd)
-
-                if 'bad object' in err.decode('utf-8'):
-                    bad_commits.append(err.decode('utf-8')[18:58])
-
-                one_commit_size = calcualte_commit_size(out)
-                commits_size_one_repos.append([commits_lst[index], one_commit_size])
-
-            prev_commits_length = len(commits_lst)
-            commits_lst = [item for item in commits_lst if item not in bad_commits]
-
-        return commits_size_one_repos
+    def _get_mirror_path(self, repos_name: str) -> str:
+        """Get path to the local mirror of a repository."""
+        return os.path.join(CACHE_FOLDER['path'], 'mirrors', self.organization, self.project_id, f'{repos_name}.git')
 
     @staticmethod
     def outliers(size):
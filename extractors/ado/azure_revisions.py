@@ -0,0 +1,109 @@
+"""Module to keep a local store of ADO work items revisions and derive statuses history from it."""
+
+import os
+import sqlite3
+import threading
+
+from datetime import datetime
+from typing import Optional
+
+import pandas as pd
+
+from ..utils.cache import CACHE_FOLDER
+from ..utils.transform import strings_to_datetime
+
+
+REVISIONS_FIELDS = ('System.State', 'Microsoft.VSTS.Common.StateChangeDate', 'System.ChangedDate')
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_revisions_store(organization: str, project_id: str) -> 'WorkItemRevisionsStore':
+    """Return a store shared by all callers in the process for the project in the current cache folder."""
+    path = os.path.join(CACHE_FOLDER['path'], 'ado_work_item_revisions', organization, f'{project_id}.sqlite')
+    with _STORES_LOCK:
+        if path not in _STORES:
+            _STORES[path] = WorkItemRevisionsStore(path)
+        return _STORES[path]
+
+
+class WorkItemRevisionsStore:
+    """
+    A local SQLite store of work items revisions of one project and the watermark (continuation token of
+    the reporting revisions API) the store is synchronized up to.
+
+    Attributes
+        path: str
+            path to the SQLite file of the store
+        sync_lock: threading.Lock
+            lock held while the store is synchronized, so one project is not downloaded twice at the same time
+    """
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.sync_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute('CREATE TABLE IF NOT EXISTS revisions (id INTEGER, rev INTEGER, state TEXT, '
+                                     'state_change_date TEXT, PRIMARY KEY (id, rev))')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS watermark (token TEXT)')
+
+    def get_watermark(self) -> Optional[str]:
+        """Return the continuation token the store is synchronized up to or None for an empty store."""
+        with self._lock:
+            row = self._connection.execute('SELECT token FROM watermark').fetchone()
+        return row[0] if row else None
+
+    def add_revisions(self, revisions: list[dict], watermark: str) -> None:
+        """Apply a batch of revisions and move the watermark in one transaction."""
+        rows = []
+        for revision in revisions:
+            fields = revision.get('fields', {})
+            rows.append((revision['id'], revision['rev'], fields.get('System.State'),
+                         fields.get('Microsoft.VSTS.Common.StateChangeDate') or fields.get('System.ChangedDate')))
+        with self._lock, self._connection:
+            self._connection.executemany('INSERT OR REPLACE INTO revisions VALUES (?, ?, ?, ?)', rows)
+            self._connection.execute('DELETE FROM watermark')
+            self._connection.execute('INSERT INTO watermark VALUES (?)', (watermark,))
+
+    def get_revisions(self, ids: list[int]) -> pd.DataFrame:
+        """Return revisions of the work items ordered by work item and revision number."""
+        ids = [int(id_) for id_ in ids]
+        rows = []
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                block = ids[i:i + 500]
+                rows += self._connection.execute(
+                    f'SELECT id, rev, state, state_change_date FROM revisions '
+                    f'WHERE state IS NOT NULL AND id IN ({", ".join("?" * len(block))})', block).fetchall()
+        df_revisions = pd.DataFrame(rows, columns=['issue_id', 'rev', 'state', 'state_change_date'])
+        return df_revisions.sort_values(['issue_id', 'rev'], ignore_index=True)
+
+
+def history_from_revisions(df_revisions: pd.DataFrame, ids: list) -> pd.DataFrame:
+    """
+    Derive statuses history from revisions the same way as from work items updates: every status lasts from its
+    state change date to the next one, the last status of an open work item lasts until now and the last status of
+    a closed work item has no end (closed items without transitions have no history).
+    """
+    request_types = dict((int(issue_id), request_type) for issue_id, request_type in ids)
+    columns = ['issue_id', 'status_history', 'from_date', 'to_date', 'time_in_status']
+    df = df_revisions[df_revisions['issue_id'].isin(request_types)]
+    # Keep only revisions where the state changed
+    df = df[df['state'] != df.groupby('issue_id')['state'].shift(1)].copy()
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+
+    df['from_date'] = strings_to_datetime(df['state_change_date'])
+    df['to_date'] = df.groupby('issue_id')['from_date'].shift(-1)
+    request_type = df['issue_id'].map(request_types)
+    is_last = df['to_date'].isna()
+    transitions_count = df.groupby('issue_id')['state'].transform('size')
+    df = df[~(is_last & (request_type == 'closed') & (transitions_count == 1))]
+    is_last, request_type = is_last[df.index], request_type[df.index]
+
+    now = datetime.utcnow().replace(microsecond=0)
+    df['to_date'] = df['to_date'].mask(is_last & (request_type == 'open'), now)
+    df['time_in_status'] = ((df['to_date'] - df['from_date']).dt.total_seconds() / (24 * 60 * 60)).round(2)
+    return df.rename(columns={'state': 'status_history'})[columns].reset_index(drop=True)
@@ -5,6 +5,9 @@ from requests.exceptions import RequestException
 
 import pandas as pd
 
+from ..ado.utils import get_organization_resources
+from ..utils.cache import get_cache, get_or_load
+
 
 pd.set_option('display.max_columns', None)
 
@@ -15,30 +18,38 @@ class AzureSearch:
         self.organization = organization
         self.user = user
         self.token = token
+        self.session, self.budget = get_organization_resources(organization, user, token)
 
     def get_projects_list(self, skip: int = 0, skip_step: int = 200) -> pd.DataFrame:
         """
         Get all projects in the organization that the authenticated user has access to.
+        The list is kept in the organization metadata cache.
         Details on a page: https://docs.microsoft.com/en-us/rest/api/azure/devops/core/projects/list
         """
+        data = get_or_load(get_cache('ado_metadata'), f'{self.organization}/{self.user}/projects',
+                           lambda: self._load_projects(skip, skip_step))
+        return pd.DataFrame(data, columns=['id', 'name', 'url'])
+
+    def _load_projects(self, skip: int, skip_step: int) -> list[dict]:
+        """Request all projects page by page."""
         next_page = True
-        df_projects = pd.DataFrame(columns=['id', 'name', 'url'])
+        data = []
         while next_page:
             request_url = f"https://dev.azure.com/{self.organization}/_apis/projects?" \
                           f"$top=200&$skip={skip}&api-version=6.0"
             response = self.make_get_request(request_url)
-            df_intermediate = self._convert_response_to_df(response)
-            df_projects = pd.concat([df_projects, df_intermediate])
+            data += self._convert_response_to_df(response).to_dict('records')
             next_page = response.headers.get('Link')
             skip += skip_step
-        return df_projects
+        return data
 
     def make_get_request(self, request_url: str) -> requests.Response:
         """Make a get request with or without authentication."""
         try:
-            if self.token is None:
-                return requests.get(request_url)  # pylint: disable=missing-timeout
-            return requests.get(request_url, auth=(self.user, self.token))  # pylint: disable=missing-timeout
+            with self.budget:
+                if self.token is None:
+                    return self.session.get(request_url)  # pylint: disable=missing-timeout
+                return self.session.get(request_url, auth=(self.user, self.token))  # pylint: disable=missing-timeout
         except RequestException as err:
             print('The following exception occurred while executing a request:', err)
             print('Please check correctness of entered data and try again!')
@@ -2,9 +2,9 @@
 This module is designed far calling its functions from main_ado.ipynb
 Functions are used for downloading data for several projects in Azure DevOps
 """
+import asyncio
 import os
 from typing import Optional
-import pandas as pd
 
 from ..ado.azure_search import AzureSearch
 
@@ -12,6 +12,8 @@ from ..ado.azure_commit import AzureDevOpsCommit
 from ..utils.read_config import AdoConfig
 from ..utils.check_input import check_if_open
 from ..utils.timer import timer
+from ..utils.concurrency import run_concurrently
+from ..utils.transform import concat_results
 from ..ado.azure import AzureDevOps
 from ..utils.constants import OUTPUT_FOLDER, OUTPUT_WORK_ITEMS, OUTPUT_MAPPING
 
@@ -22,6 +24,9 @@ if os.path.exists(CONFIG_PATH):
     ADO_CREDS = AdoConfig(CONFIG_PATH)
     ORGANIZATION, USER, TOKEN = ADO_CREDS.organization, ADO_CREDS.user, ADO_CREDS.token
 
+# Requests of all projects share the organization concurrency budget (see ado.utils)
+PROJECTS_CONCURRENCY = 8
+
 
 # Get information on work items
 @timer
@@ -33,6 +38,7 @@ def get_work_items_several_projects(
     area,
     ado_search: Optional[AzureSearch] = None,
     to_save=False,
+    incremental=False,
 ):
     """Get work items of several projects."""
     projects_list = projects.split(',')
@@ -41,19 +47,20 @@ def get_work_items_several_projects(
     user = ado_search.user if ado_search else USER
     token = ado_search.token if ado_search else TOKEN
 
-    df_result = pd.DataFrame()
-    for project in projects_list:
+    def work_items_one_project(project):
         ads = AzureDevOps(organization, project, "main", user, token=token)
+        return ads.concat_work_items_and_history(resolved_after, updated_after, created_after, area, incremental)
 
-        df_wi_history, df_statuses = ads.concat_work_items_and_history(
-            resolved_after, updated_after, created_after, area
-        )
+    results = run_concurrently(work_items_one_project, projects_list, max_workers=PROJECTS_CONCURRENCY)
+    df_result_lst = []
+    for project, (df_wi_history, df_statuses) in zip(projects_list, results):
         if df_statuses is not None:
             if to_save:
                 file_statuses = f"{OUTPUT_MAPPING}{project}.csv"
                 check_if_open(file_statuses)
                 df_statuses.to_csv(file_statuses, index=True, index_label="id")
-            df_result = pd.concat([df_result, df_wi_history], axis=0)
+            df_result_lst.append(df_wi_history)
+    df_result = concat_results(df_result_lst)
     if to_save:
         file_result = f"{OUTPUT_WORK_ITEMS}{projects}.csv"
         check_if_open(file_result)
@@ -77,19 +84,22 @@ async def get_commits_several_projects(
     user = ado_search.user if ado_search else USER
     token = ado_search.token if ado_search else TOKEN
 
-    result_df = pd.DataFrame()
-    # loop through projects
-    for prj in projects_lst:
-        ads = AzureDevOpsCommit(organization, prj, user, token=token)
+    projects_budget = asyncio.Semaphore(PROJECTS_CONCURRENCY)
 
-        if new_version:
-            df1 = await ads.get_commits_details(since_date, with_commit_size)
-        else:
-            df1 = await ads.get_commits_details_and_size(since_date)
+    async def commits_one_project(prj):
+        ads = AzureDevOpsCommit(organization, prj, user, token=token)
+        async with projects_budget:
+            if new_version:
+                df1 = await ads.get_commits_details(since_date, with_commit_size)
+            else:
+                df1 = await ads.get_commits_details_and_size(since_date)
         if df1 is None:
             print(f'There are no comments for the selected period in {prj} project!')
-            continue
-        result_df = pd.concat([result_df, df1], axis=0)
+        return df1
+
+    # run projects concurrently (at most PROJECTS_CONCURRENCY at a time) and gather results once
+    results = await asyncio.gather(*[commits_one_project(prj) for prj in projects_lst])
+    result_df = concat_results(results)
 
     if to_save:
         # check if csv files with the same name are open
@@ -105,19 +115,17 @@ def get_merge_requests_several_projects(project, since_date, ado_search: Optiona
     # transform projects names to list
     projects_lst =[prj.strip() for prj in project.split(',')]
 
-    result_df = pd.DataFrame()
-
     organization = ado_search.organization if ado_search else ORGANIZATION
     user = ado_search.user if ado_search else USER
     token = ado_search.token if ado_search else TOKEN
 
-    # loop through projects
-    for prj in projects_lst:
+    def merge_requests_one_project(prj):
         ads = AzureDevOps(organization, prj, 'main', user, token=token)
+        return ads.get_all_pull_requests_details(since_date)
 
-        df1 = ads.get_all_pull_requests_details(since_date)
-        if df1 is not None:
-            result_df = pd.concat([result_df, df1], axis=0)
+    # run projects concurrently and gather results once
+    result_df = concat_results(
+        run_concurrently(merge_requests_one_project, projects_lst, max_workers=PROJECTS_CONCURRENCY))
 
     if to_save:
         f2 = f'{OUTPUT_FOLDER}merge_requests_details_{project}.csv'
@@ -128,7 +136,7 @@ def get_merge_requests_several_projects(project, since_date, ado_search: Optiona
 
 
 def get_pipelines_runs_several_projects(
-    project, ado_search: Optional[AzureSearch] = None, to_save=False
+    project, since_date: Optional[str] = None, ado_search: Optional[AzureSearch] = None, to_save=False
 ):
     """Get ADO pipelines runs of several projects."""
     # transform projects names to list
@@ -138,18 +146,42 @@ def get_pipelines_runs_several_projects(
     user = ado_search.user if ado_search else USER
     token = ado_search.token if ado_search else TOKEN
 
-    result_df = pd.DataFrame()
-
-    # loop through projects
-    for prj in projects_lst:
+    def pipelines_runs_one_project(prj):
         ads = AzureDevOps(organization, prj, "main", user, token=token)
+        return ads.get_pipelines_runs_and_timeline(to_save=to_save, since_date=since_date)
 
-        df1 = ads.get_pipelines_runs_and_timeline(to_save=to_save)
-        if df1 is not None:
-            result_df = pd.concat([result_df, df1], axis=0)
+    # run projects concurrently and gather results once
+    result_df = concat_results(
+        run_concurrently(pipelines_runs_one_project, projects_lst, max_workers=PROJECTS_CONCURRENCY))
     if to_save:
         # check if csv files with the same name are open
         f = f"{OUTPUT_FOLDER}pipelines_runs_{project}.csv"
         check_if_open(f)
         result_df.to_csv(f, index=False)
     return result_df
+
+
+def get_iterations_several_projects(project, ado_search: Optional[AzureSearch] = None, to_save=False):
+    """Get ADO iterations (sprints) of teams of several projects."""
+    # transform projects names to list
+    projects_lst =[prj.strip() for prj in project.split(',')]
+
+    organization = ado_search.organization if ado_search else ORGANIZATION
+    user = ado_search.user if ado_search else USER
+    token = ado_search.token if ado_search else TOKEN
+
+    def iterations_one_project(prj):
+        ads = AzureDevOps(organization, prj, "main", user, token=token)
+        df_iterations = ads.get_iterations()
+        if df_iterations is not None and not df_iterations.empty:
+            df_iterations['project_name'] = prj
+        return df_iterations
+
+    # run projects concurrently and gather results once
+    result_df = concat_results(
+        run_concurrently(iterations_one_project, projects_lst, max_workers=PROJECTS_CONCURRENCY))
+    if to_save:
+        f = f"{OUTPUT_FOLDER}iterations_{project}.csv"
+        check_if_open(f)
+        result_df.to_csv(f, index=False)
+    return result_df
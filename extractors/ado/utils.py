@@ -1,8 +1,12 @@
 """Utils for ADO."""
 import functools
+import threading
 import time
+from typing import Optional
 import requests
 
+from ..utils.http_session import credential_hash, get_shared_resources
+
 
 def repeat_request(repeat_num=10):
     """Decorator that repeat requests in case of fails."""
@@ -25,3 +29,15 @@ def repeat_request(repeat_num=10):
             return response
         return wrapper
     return decorator
+
+
+ORGANIZATION_CONCURRENCY = 16
+
+
+def get_organization_resources(organization: str, user: str,
+                               token: Optional[str] = None) -> tuple[requests.Session, threading.BoundedSemaphore]:
+    """
+    Get a pooled session of the user and token and a concurrency budget shared by all requests to the organization.
+    """
+    return get_shared_resources(('ado', organization, user, credential_hash(token)), ('ado', organization),
+                                ORGANIZATION_CONCURRENCY)
@@ -1,14 +1,17 @@
 ''' Module for searching and extracting data from GitLab. '''
+import logging
 from functools import wraps
 from typing import Optional
 import requests
 import pandas as pd
 
 from ..utils import exceptions as e
+from ..utils.concurrency import run_concurrently
 from ..utils.read_config import GitConfig
-from ..git.gitlab import GitLabV4
+from ..git.gitlab import GitLabV4, REQUEST_TIMEOUT, get_instance_resources, load_pages
 
 CONFIG_PATH = './conf/config.yml'
+PROJECTS_CONCURRENCY = 8
 
 
 def loop_projects(data: list[dict]) -> tuple[list, list]:
@@ -39,72 +42,88 @@ def loop_projects(data: list[dict]) -> tuple[list, list]:
     return projects_ids, projects_lst
 
 
-def add_merge_req_info(func):
+# Errors of a single project do not stop enrichment of other projects
+PROJECT_ERRORS = (e.NotFoundException, e.AbsentAccessToRepository, e.Unknown, requests.exceptions.RequestException)
+
+
+def _get_credentials(instance) -> tuple[str, str]:
     '''
-    Decorator to add merge request information to the project data.
+    Get GitLab URL and token of the search instance or from the config.
     '''
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        result = func(*args, **kwargs)
+    url, token = instance.url, instance.token
+    if not url or not token:
+        git_config = GitConfig(CONFIG_PATH)
+        url, token = git_config.url, git_config.token
+    return url, token
 
-        instance = args[0]  # args[0] is 'self'
-        url = instance.url
-        token = instance.token
-        if not url or not token:           
-            git_config = GitConfig(CONFIG_PATH)
-            url, token = git_config.url, git_config.token
 
-        count_merge_req = []
-        if not isinstance(result, pd.DataFrame) and not result:
-            return None
-        for prj in result['projects_id'].to_list():
-            git_project = GitLabV4(url=url, project_id=prj, default_branch_name='master', token=token)
-            count_merge_req += [git_project.get_merge_req_state_count()]
-        merge_req_df = pd.DataFrame(count_merge_req)
-        merge_req_df.columns = ['pull_req_opened', 'pull_req_closed', 'pull_req_merged', 'projects_id']
-        projects = result.merge(merge_req_df, on='projects_id')
-        projects['pull_req_total'] = projects['pull_req_merged'] + projects['pull_req_closed'] + projects[
-            'pull_req_opened']
-        projects = projects.sort_values(['pull_req_total'], ascending=False)
-        return projects
+def _merge_req_info(projects: pd.DataFrame, url: str, token: str) -> pd.DataFrame:
+    '''
+    Count merge requests states of the projects concurrently.
+    '''
+    def merge_req_one_project(prj):
+        git_project = GitLabV4(url=url, project_id=prj, default_branch_name='master', token=token)
+        try:
+            return git_project.get_merge_req_state_count()
+        except PROJECT_ERRORS as err:
+            logging.warning(f'Failed to count merge requests for the project {prj}: {err}')
+            return {'Open': None, 'Closed': None, 'Merged': None, 'projects_id': prj}
 
-    return wrapper
+    count_merge_req = run_concurrently(merge_req_one_project, projects['projects_id'].to_list(),
+                                       max_workers=PROJECTS_CONCURRENCY)
+    merge_req_df = pd.DataFrame(count_merge_req, columns=['Open', 'Closed', 'Merged', 'projects_id'])
+    merge_req_df.columns = ['pull_req_opened', 'pull_req_closed', 'pull_req_merged', 'projects_id']
+    # Counts of failed projects are NaN, so the total can be calculated even if all projects failed
+    return merge_req_df.apply(pd.to_numeric)
 
 
-def add_branches_info(func):
+def _branches_info(projects: pd.DataFrame, url: str, token: str) -> pd.DataFrame:
     '''
-    Decorator to add branches information to the project data.
+    Count active and stale branches of the projects concurrently.
+    '''
+    def branches_one_project(prj):
+        git_project = GitLabV4(url=url, project_id=prj, default_branch_name='master', token=token)
+        try:
+            branches_df = git_project.get_repo_branches()
+        except PROJECT_ERRORS as err:
+            logging.warning(f'Failed to get branches for the project {prj}: {err}')
+            branches_df = None
+        if branches_df is None:
+            return {'Active': None, 'Stale': None, 'projects_id': prj}
+        return {'Active': branches_df['branch_status'].to_list().count("Active"),
+                'Stale': branches_df['branch_status'].to_list().count("Stale"),
+                'projects_id': prj}
+
+    branches_count = run_concurrently(branches_one_project, projects['projects_id'].to_list(),
+                                      max_workers=PROJECTS_CONCURRENCY)
+    return pd.DataFrame(branches_count, columns=['Active', 'Stale', 'projects_id'])
+
+
+def _add_merge_req_total(projects: pd.DataFrame) -> pd.DataFrame:
+    '''
+    Add the total number of merge requests and sort projects by it.
+    '''
+    projects['pull_req_total'] = projects['pull_req_merged'] + projects['pull_req_closed'] + projects[
+        'pull_req_opened']
+    return projects.sort_values(['pull_req_total'], ascending=False)
+
+
+def add_branches_and_merge_req_info(func):
+    '''
+    Decorator to add branches and merge request information to the project data.
+    Both are collected at the same time.
     '''
     @wraps(func)
     def wrapper(*args, **kwargs):
         result = func(*args, **kwargs)
-
-        instance = args[0]  # args[0] is 'self'
-        url = instance.url
-        token = instance.token
-        if not url or not token:
-            git_config = GitConfig(CONFIG_PATH)
-            url, token = git_config.url, git_config.token
-
-        branches_count = []
         if not isinstance(result, pd.DataFrame) and not result:
             return None
-        for prj in result['projects_id'].to_list():
-            git_project = GitLabV4(url=url, project_id=prj, default_branch_name='master', token=token)
-            try:
-                branches_df = git_project.get_repo_branches()
-                if branches_df is not None:
-                    branches_count_one_prj = {'Active': branches_df['branch_status'].to_list().count("Active"),
-                                              'Stale': branches_df['branch_status'].to_list().count("Stale"),
-                                              'projects_id': git_project.project_id}
-                else:
-                    branches_count_one_prj = {'Active': None, 'Stale': None, 'projects_id': git_project.project_id}
-            except (e.NotFoundException, e.AbsentAccessToRepository):
-                branches_count_one_prj = {'Active': None, 'Stale': None, 'projects_id': git_project.project_id}
-            branches_count += [branches_count_one_prj]
-        branches_count_df = pd.DataFrame(branches_count)
-        projects = result.merge(branches_count_df, on='projects_id')
-        return projects
+
+        url, token = _get_credentials(args[0])  # args[0] is 'self'
+        branches_df, merge_req_df = run_concurrently(lambda enrich: enrich(result, url, token),
+                                                     [_branches_info, _merge_req_info])
+        projects = result.merge(branches_df, on='projects_id').merge(merge_req_df, on='projects_id')
+        return _add_merge_req_total(projects)
 
     return wrapper
 
@@ -117,43 +136,46 @@ class GitLabV4Search:
         self.url = url
         self.default_branch_name = default_branch_name
         self.token = token
+        self.session, self.budget = get_instance_resources(url, token)
 
-    def _load_data(self, url_suffix: str) -> tuple[bool, dict]:
+    def _get(self, url_suffix: str) -> requests.Response:
         '''
-        Makes GET request to load data from GitLab API.
+        Makes GET request to GitLab API and checks the response code.
         '''
-
         request_url = f"https://{self.url}/api/v4/{url_suffix}"
         headers = {"PRIVATE-TOKEN": f"{self.token}"} if self.token else {}
-        req = requests.get(request_url, headers=headers)  # pylint: disable=missing-timeout
+        with self.budget:
+            req = self.session.get(request_url, headers=headers, timeout=REQUEST_TIMEOUT)
         if req.status_code == 404:
             raise e.NotFoundException(CONFIG_PATH)
         if req.status_code != 200:
             raise requests.exceptions.HTTPError(f"Request failed with status {req.status_code}")
+        return req
 
+    def _load_data(self, url_suffix: str) -> tuple[bool, dict]:
+        '''
+        Makes GET request to load data from GitLab API.
+        '''
+        req = self._get(url_suffix)
         next_page = req.headers.get('X-Next-Page')
         is_next_page_exist = bool(next_page)
         data = req.json()
         return is_next_page_exist, data
 
-    def projects_info(self, last_activity_after: str, page: int = 1) -> pd.DataFrame:
+    def projects_info(self, last_activity_after: str) -> pd.DataFrame:
         '''
         Get information about GitLab projects.
         '''
-        is_next_page_exist, data = self._load_data(f'projects?page={page}&per_page=100'
-                                                   f'&simple=False&statistics=True'
-                                                   f'&state=open&last_activity_after={last_activity_after}')
+        # By default, GET requests return 20 results at a time because the API results are paginated
+        data = load_pages(lambda page: self._get(f'projects?page={page}&per_page=100'
+                                                 f'&simple=False&statistics=True'
+                                                 f'&state=open&last_activity_after={last_activity_after}'))
         _, projects_lst = loop_projects(data)
         projects = pd.DataFrame(projects_lst, columns=['projects_id', 'project_name', 'description', 'commits_num',
                                                        'http_url_to_repo', 'web_url', 'default_branch'])
-        projects = projects.sort_values(by='commits_num', na_position='last', ascending=False)
-        # By default, GET requests return 20 results at a time because the API results are paginated
-        if is_next_page_exist:
-            next_projects = self.projects_info(last_activity_after, page + 1)
-            projects = pd.concat([projects, next_projects], ignore_index=True)
-        return projects
+        return projects.sort_values(by='commits_num', na_position='last', ascending=False, ignore_index=True)
 
-    extended_project_info = add_merge_req_info(add_branches_info(projects_info))
+    extended_project_info = add_branches_and_merge_req_info(projects_info)
 
     def single_project(self, prj_ids: list[int]) -> list[dict]:
         '''
@@ -165,17 +187,12 @@ class GitLabV4Search:
             data_single_prj += [data]
         return data_single_prj
 
-    def search_projects_one_key(self, key: str, page: int = 1) -> tuple[list, list]:
+    def search_projects_one_key(self, key: str) -> tuple[list, list]:
         '''
-        Search recursively GitLab all projects by key.
+        Search GitLab all projects by key.
         '''
-        is_next_page_exist, data = self._load_data(f'search?page={page}&scope=projects&search={key}')
-        projects_ids, projects_lst = loop_projects(data)
-        if is_next_page_exist:
-            next_project_ids, next_projects = self.search_projects_one_key(key, page + 1)
-            projects_ids += next_project_ids
-            projects_lst += next_projects
-        return projects_ids, projects_lst
+        data = load_pages(lambda page: self._get(f'search?page={page}&scope=projects&search={key}'))
+        return loop_projects(data)
 
     def search_projects_many_keys(self,  keys: str) -> tuple[list, list]:
         '''
@@ -236,8 +253,7 @@ class GitLabV4Search:
                 commits_lst += [projects_id]
         return commits_lst
 
-    @add_branches_info
-    @add_merge_req_info
+    @add_branches_and_merge_req_info
     def compile_search(self, keys: str) -> pd.DataFrame | None:
         '''
         Search and extract projects and merge requests data.
@@ -2,19 +2,57 @@
 # first commit -> last commit -> pause time -> merger req created ->
 # ->  merge req processed (merged) ready to deploy on first stage of some env
 import json
+import threading
 from datetime import datetime
 import logging
-from typing import Optional
+from typing import Callable, Optional
 import requests
 import pandas as pd
 
+from ..utils.cache import get_cache, get_many_or_load, load_each
 from ..utils.outliers import get_outliers_upper_bound
+from ..utils.concurrency import run_concurrently
+from ..utils.http_session import credential_hash, get_shared_resources
 from ..utils import exceptions as e
 
 
 pd.set_option('display.max_columns', None)
 pd.set_option('display.max_rows', None)
 
+REQUEST_TIMEOUT = 60
+INSTANCE_CONCURRENCY = 16
+
+
+def get_instance_resources(url: str,
+                           token: Optional[str] = None) -> tuple[requests.Session, threading.BoundedSemaphore]:
+    '''
+    Get a pooled session of the token and a concurrency budget shared by all requests to the GitLab instance.
+    '''
+    return get_shared_resources(('gitlab', url, credential_hash(token)), ('gitlab', url), INSTANCE_CONCURRENCY)
+
+
+def load_pages(load_page: Callable[[int], requests.Response]) -> list:
+    '''
+    Load rows of all pages of a GitLab list endpoint. If the first page has the X-Total-Pages header, the remaining
+    pages are loaded concurrently, otherwise (GitLab omits totals for large collections) pages are loaded one by one
+    following X-Next-Page.
+    (details on page https://docs.gitlab.com/ee/api/rest/#pagination)
+    '''
+    response = load_page(1)
+    rows = list(response.json())
+    total_pages = response.headers.get('X-Total-Pages')
+    if total_pages:
+        for page_rows in run_concurrently(lambda page: load_page(page).json(), range(2, int(total_pages) + 1)):
+            rows.extend(page_rows)
+        return rows
+
+    next_page = response.headers.get('X-Next-Page')
+    while next_page:
+        response = load_page(int(next_page))
+        rows.extend(response.json())
+        next_page = response.headers.get('X-Next-Page')
+    return rows
+
 
 class GitLabV4():
     ''' Class for working with GitLab API v4. '''
@@ -24,77 +62,103 @@ class GitLabV4():
         self.default_branch_name = default_branch_name
         self.token = token
         self.reponse_code_handler = e.ResponseCodeHandler(project_id)
+        self.session, self.budget = get_instance_resources(url, token)
 
-    def _load_data(self, url_suffix: str) -> tuple[bool, pd.DataFrame]:
+    def _get(self, url_suffix: str) -> requests.Response:
         '''
-        Makes GET request to load data from GitLab API.
+        Makes GET request to GitLab API and checks the response code.
         '''
         request_url = f"https://{self.url}/api/v4/projects/{self.project_id}/{url_suffix}"
         headers = {"PRIVATE-TOKEN": f"{self.token}"} if self.token else {}
-        req = requests.get(request_url, headers=headers)  # pylint: disable=missing-timeout
+        with self.budget:
+            req = self.session.get(request_url, headers=headers, timeout=REQUEST_TIMEOUT)
         self.reponse_code_handler.process_response_code(req.status_code)
+        return req
 
+    def _load_data(self, url_suffix: str) -> tuple[bool, pd.DataFrame]:
+        '''
+        Makes GET request to load data from GitLab API.
+        '''
+        req = self._get(url_suffix)
         next_page = req.headers.get('X-Next-Page')
         is_next_page_exist = bool(next_page)
         content = json.loads(req.content)
         df = pd.json_normalize(content)
         return is_next_page_exist, df
 
-    def get_commits_details(self, since_date: str, page: int = 1) -> pd.DataFrame:
+    def _load_all_data(self, url_suffix: str) -> pd.DataFrame:
+        '''
+        Loads all pages of a list from GitLab API into one data frame.
+        '''
+        separator = '&' if '?' in url_suffix else '?'
+        rows = load_pages(lambda page: self._get(f"{url_suffix}{separator}page={page}"))
+        return pd.json_normalize(rows)
+
+    def get_commits_details(self, since_date: str, with_stats: bool = False) -> pd.DataFrame:
         '''
-        Get recursively list of all repository commits for a project starting from specific date
+        Get list of all repository commits for a project starting from specific date.
+        With stats the size of commits (added plus removed lines) is returned in the commit_size column.
         (details on page https://docs.gitlab.com/ee/api/commits.html#list-repository-commits)
         '''
-        is_next_page_exist, df = self._load_data(f"repository/commits?since={since_date}&per_page=100&page={page}")
+        df = self._load_all_data(f"repository/commits?since={since_date}&per_page=100"
+                                 f"{'&with_stats=true' if with_stats else ''}")
         if df.empty:
             return pd.DataFrame()
 
-        commits_df = df.loc[:, ['created_at', 'message', 'id',
-                                'committed_date', 'authored_date', 'title']]
-        if is_next_page_exist:
-            next_commits_df = self.get_commits_details(since_date, page=page + 1)
-            commits_df = pd.concat([commits_df, next_commits_df], ignore_index=True)
-        return commits_df
+        columns = ['created_at', 'message', 'id', 'committed_date', 'authored_date', 'title']
+        if with_stats:
+            df['commit_size'] = df['stats.total'] if 'stats.total' in df.columns else None
+            columns.append('commit_size')
+        return df.loc[:, columns]
 
-    def get_commits_details_per_branch(self, ref_name: str, page: int = 1) -> pd.DataFrame:
+    def get_commits_details_per_branch(self, ref_name: str) -> pd.DataFrame:
         '''
-        Get recursively information on first commit to a branch -- list of commits filtered by specific merge request
+        Get information on first commit to a branch -- list of commits filtered by specific merge request
         (details on page https://docs.gitlab.com/ee/api/commits.html#list-repository-commits)
         '''
-        is_next_page_exist, df = self._load_data(
-            f"repository/commits?ref_name={ref_name}&first_parent=False&per_page=100&page={page}")
-        commits_df = df.loc[:, ['created_at', 'message', 'id', 'committed_date', 'authored_date']]
-        if is_next_page_exist:
-            next_commits_df = self.get_commits_details_per_branch(ref_name, page=page + 1)
-            commits_df = pd.concat([commits_df, next_commits_df], ignore_index=True)
-        return commits_df
+        df = self._load_all_data(f"repository/commits?ref_name={ref_name}&first_parent=False&per_page=100")
+        columns = ['created_at', 'message', 'id', 'committed_date', 'authored_date']
+        if df.empty:
+            return pd.DataFrame(columns=columns)
+        return df.loc[:, columns]
 
     def get_single_commit(self, commits_df: pd.DataFrame) -> pd.DataFrame:
         '''
-        Get recursively information on a single commit (added and removed lines etc)
+        Get size of non-merge commits (added and removed lines). Sizes from the commit_size column are used,
+        a single commit is requested only where the size is missing. Requested sizes are cached by commit SHA.
         (details on page https://docs.gitlab.com/ee/api/commits.html#get-a-single-commit)
         '''
-        single_commits_info = []
-        commits_df = commits_df[~commits_df['title'].str.contains('^Merge branch .*', regex=True)]
-        commits_df = commits_df[~commits_df['title'].str.contains("^Merge branch '.*' of .*", regex=True)]
-        for commit in commits_df['id'].to_list():
-            _, df = self._load_data(f"repository/commits/{commit}")
-            single_commits_info += [[commit, df.loc[0, 'stats.total']]]
-        single_commit_df = pd.DataFrame(single_commits_info, columns=['id', 'commit_size'])
+        commits_df = commits_df[~commits_df['title'].str.startswith('Merge branch ', na=False)]
+        if 'commit_size' in commits_df.columns:
+            sizes = commits_df.set_index('id')['commit_size'].astype(float)
+        else:
+            sizes = pd.Series(None, index=commits_df['id'], dtype=float)
+
+        keys = {sha: f'{self.url}/{self.project_id}/{sha}' for sha in sizes.index[sizes.isna()]}
+        loaded = get_many_or_load(get_cache('gitlab_commits_sizes'), keys, load_each(self._get_commit_size))
+        sizes = sizes.fillna(pd.Series({sha: loaded.get(sha) for sha in keys}, dtype=float))
 
-        return single_commit_df
+        return pd.DataFrame({'id': sizes.index, 'commit_size': sizes.astype('Int64').values})
+
+    def _get_commit_size(self, commit_id: str) -> Optional[int]:
+        '''
+        Get size of a single commit (added and removed lines)
+        (details on page https://docs.gitlab.com/ee/api/commits.html#get-a-single-commit)
+        '''
+        return self._get(f"repository/commits/{commit_id}").json().get('stats', {}).get('total')
 
     def get_commits_details_and_size(self, since_date: str) -> Optional[pd.DataFrame]:
         '''
         Merge commits' details with info on their size
         Aggregations of all commits and extra information
         '''
-        commits_df = self.get_commits_details(since_date)
+        commits_df = self.get_commits_details(since_date, with_stats=True)
         if commits_df is None or commits_df.empty:
             return None
 
         single_commit_df = self.get_single_commit(commits_df)
-        commits_details_and_size_df: pd.DataFrame = commits_df.merge(single_commit_df, how='inner', on='id')
+        commits_details_and_size_df: pd.DataFrame = commits_df.drop(columns=['commit_size']).merge(
+            single_commit_df, how='inner', on='id')
         commits_details_and_size_df['project_id'] = self.project_id
         commits_details_and_size_df = commits_details_and_size_df[['project_id', 'created_at', 'message',
                                                                     'id', 'committed_date',
@@ -107,94 +171,79 @@ class GitLabV4():
         print('Commits data has been downloaded')
         return commits_details_and_size_df
 
-    def get_associated_commits_to_merge_req(self, merge_req_id: str) -> pd.DataFrame:
+    def _get_merge_req_commit_dates(self, merge_req_id: int) -> Optional[list]:
         '''
+        Get dates of the first and the last commits of a merge request (None if it has no commits)
         (details on page https://docs.gitlab.com/ee/api/merge_requests.html#get-single-mr-commits)
         '''
-        _, df = self._load_data(f"merge_requests/{merge_req_id}/commits")
-        if df.empty:
-            return pd.DataFrame()
+        commits = load_pages(lambda page: self._get(f"merge_requests/{merge_req_id}/commits?per_page=100&page={page}"))
+        dates = [commit['created_at'] for commit in commits if commit.get('created_at')]
+        return [min(dates), max(dates)] if dates else None
 
-        return df.loc[:, ['created_at', 'message', 'id']]
-
-    def get_merge_req_state_count(self, page: int = 0) -> dict:
+    def get_merge_req_state_count(self) -> dict:
         '''
-        Get statistics on merge requests states for one project (number of merge requests open, closed and merged)
+        Get statistics on merge requests states for one project (number of merge requests open, closed and merged).
+        Numbers are taken from the X-Total header of one-item pages of merge requests in every state.
         (details on page https://docs.gitlab.com/ee/api/merge_requests.html#list-project-merge-requests)
         '''
-        request_url = f"https://{self.url}/api/v4/projects/{self.project_id}" + \
-                      f"/merge_requests?state=all&per_page=100&page={page}"
         merge_req_state_count = {'Open': None, 'Closed': None, 'Merged': None, 'projects_id': self.project_id}
-        data_fin = []
-        while True:
-            r = requests.get(request_url, headers={"PRIVATE-TOKEN": f"{self.token}"})  # pylint: disable=missing-timeout
-
-            if r.status_code in [403, 404]:
-                logging.warning(f'Error {r.status_code} while getting merge requests for the project {self.project_id}')
+        counts = {}
+        for key, state in (('Open', 'opened'), ('Closed', 'closed'), ('Merged', 'merged')):
+            counts[key] = self._count_merge_requests(state)
+            if counts[key] is None:
                 return merge_req_state_count
 
-            data = r.json()
-            data_fin += data
-
-            if 'next' in r.links:  # check if there is another page of organisations
-                request_url = r.links['next']['url']
-            else:
-                break
+        merge_req_state_count.update(counts)
+        return merge_req_state_count
 
-        if data_fin:
-            merge_req_state = [item['state'] for item in data_fin]
-            merge_req_state_count.update({'Open': merge_req_state.count("opened"),
-                                          'Closed': merge_req_state.count("closed"),
-                                          'Merged': merge_req_state.count("merged")})
+    def _count_merge_requests(self, state: str) -> Optional[int]:
+        '''
+        Count merge requests of the project in the state. GitLab omits totals for very large lists,
+        then merge requests are counted page by page. Returns None if merge requests are not accessible.
+        '''
+        request_url = f"https://{self.url}/api/v4/projects/{self.project_id}/merge_requests?state={state}&per_page=1"
+        with self.budget:
+            r = self.session.get(request_url, headers={"PRIVATE-TOKEN": f"{self.token}"}, timeout=REQUEST_TIMEOUT)
+        if r.status_code in [403, 404]:
+            logging.warning(f'Error {r.status_code} while getting merge requests for the project {self.project_id}')
+            return None
 
-        return merge_req_state_count
+        total = r.headers.get('X-Total')
+        if total:
+            return int(total)
+        return len(load_pages(lambda page: self._get(f"merge_requests?state={state}&per_page=100&page={page}")))
 
-    def get_all_merge_requests_details(self, created_after: str, page: int = 1) -> pd.DataFrame | None:
+    def get_all_merge_requests_details(self, created_after: str) -> pd.DataFrame | None:
         '''
-        Get recursively data on all merge requests for a project starting from specific date.
+        Get data on all merge requests for a project starting from specific date.
         Note: merge_at is a datetime of merge, merge_commit_sha is link to system commit of merge
         (details on page https://docs.gitlab.com/ee/api/merge_requests.html#list-project-merge-requests)
         '''
-        is_next_page_exist, df = self._load_data(
-            f"merge_requests?created_after={created_after}&state=all&per_page=100&page={page}")
+        df = self._load_all_data(f"merge_requests?created_after={created_after}&state=all&per_page=100")
         if df.empty:
             return None
 
-        merge_req_ids = df['iid'].to_numpy()
-        merge_req_df = df.loc[:, ['iid', 'created_at', 'merged_at', 'closed_at',
-                                  'merge_commit_sha', 'source_branch']]
-        merge_req_df.set_index('iid', inplace=True)
-        merge_req_df['first_commit_date'] = ''
-        merge_req_df['last_commit_date'] = ''
-        for merge_req_id in merge_req_ids:
-            merge_req_commits_df = self.get_associated_commits_to_merge_req(merge_req_id)
-            if merge_req_commits_df.empty:
-                print("empty df")
-            else:
-                commit_min_date = merge_req_commits_df['created_at'].min()
-                commit_max_date = merge_req_commits_df['created_at'].max()
-                merge_req_df.at[merge_req_id, 'first_commit_date'] = commit_min_date
-                merge_req_df.at[merge_req_id, 'last_commit_date'] = commit_max_date
-                merge_req_df['project_id'] = self.project_id
-                merge_req_df = merge_req_df[['project_id', 'created_at', 'merged_at', 'closed_at',
-                                             'merge_commit_sha', 'source_branch', 'first_commit_date',
-                                             'last_commit_date']]
-        if is_next_page_exist:
-            next_merge_req_df = self.get_all_merge_requests_details(created_after, page=page + 1)
-            merge_req_df = pd.concat([merge_req_df, next_merge_req_df], ignore_index=True)
-            merge_req_df['project_id'] = self.project_id
-            merge_req_df = merge_req_df[['project_id', 'created_at', 'merged_at', 'closed_at',
-                                         'merge_commit_sha', 'source_branch', 'first_commit_date',
-                                         'last_commit_date']]
+        # Commits of merged and closed merge requests do not change, so their dates are cached
+        keys = {iid: f'{self.url}/{self.project_id}/{iid}' for iid in df['iid'].tolist()}
+        finished = set(df.loc[df['state'].isin(['merged', 'closed']), 'iid']) if 'state' in df.columns else set()
+        commit_dates = get_many_or_load(get_cache('gitlab_merge_requests_commit_dates'), keys,
+                                        load_each(self._get_merge_req_commit_dates),
+                                        keep=lambda iid, dates: iid in finished and bool(dates))
+
+        merge_req_df = df.loc[:, ['created_at', 'merged_at', 'closed_at', 'merge_commit_sha', 'source_branch']]
+        dates = df['iid'].map(lambda iid: commit_dates.get(iid) or ['', ''])
+        merge_req_df['first_commit_date'] = dates.str[0]
+        merge_req_df['last_commit_date'] = dates.str[1]
+        merge_req_df.insert(0, 'project_id', self.project_id)
         print('Merge requests data has been downloaded')
         return merge_req_df
 
-    def get_repo_branches(self, page: int = 1) -> pd.DataFrame | None:
+    def get_repo_branches(self) -> pd.DataFrame | None:
         '''
-        Get recursively list of all repository branches for a project
+        Get list of all repository branches for a project
         (details on page https://docs.gitlab.com/ee/api/branches.html)
         '''
-        is_next_page_exist, df = self._load_data(f"repository/branches?page={page}")
+        df = self._load_all_data("repository/branches?per_page=100")
         if df.empty:
             return None
 
@@ -202,10 +251,6 @@ class GitLabV4():
             lambda x: datetime.strptime(x[:10], '%Y-%m-%d'))
         df['lt'] = (datetime.today() - df['commit.committed_date']).dt.days
         df['branch_status'] = df['lt'].map(lambda x: "Active" if x < 90 else "Stale")
-        if is_next_page_exist:
-            next_branch_df = self.get_repo_branches(page=page + 1)
-            df = pd.concat([df, next_branch_df], ignore_index=True)
-
         return df
 
     def get_commits_for_branches(self) -> pd.DataFrame:
@@ -3,10 +3,11 @@ This module is designed far calling it functions from the main_git.ipynb.
 Functions are used for downloading data from GitLab.
 """
 import os
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional
 import pandas as pd
 
-from ..git.git_search import GitLabV4Search, GitLabV4
+from ..git.git_search import GitLabV4Search, GitLabV4, PROJECT_ERRORS
+from ..utils.concurrency import run_concurrently
 from ..utils.constants import OUTPUT_FOLDER
 from ..utils.read_config import GitConfig
 from ..utils.check_input import check_if_open
@@ -70,22 +71,44 @@ def get_git_projects_that_in_jira(project_keys: str, to_save=False, git: Optiona
 
     return result
 
-@timer
-def get_git_commits(project: str, since_date: str, git_search: Optional[GitLabV4Search] = None, to_save=False) -> None | pd.DataFrame:
-    """Get commits' data for one GitLab project."""
-    if git_search is None:
-        git = GitLabV4(
-            url=URL, project_id=project, default_branch_name="master", token=TOKEN
-        )
+PROJECTS_CONCURRENCY = 8
+
+
+def _load_projects(project: str, load: Callable[[GitLabV4], Optional[pd.DataFrame]],
+                   git_search: Optional[GitLabV4Search] = None) -> Optional[pd.DataFrame]:
+    """
+    Load data of comma-separated GitLab projects concurrently and combine it in one frame.
+    Projects that fail are skipped, the error is raised only if all of them fail.
+    """
+    if git_search is None or git_search.token is None:
+        url, token = URL, TOKEN
     else:
-        git = GitLabV4(
-            url=git_search.url, project_id=project, default_branch_name="master", token=git_search.token
-        )
+        url, token = git_search.url, git_search.token
+
+    def load_one_project(project_id):
+        git = GitLabV4(url=url, project_id=project_id, default_branch_name='master', token=token)
+        try:
+            return load(git), None
+        except PROJECT_ERRORS as err:
+            print(f'Failed to get data for the project {project_id}:', err)
+            return None, err
+
+    projects_ids = [project_id.strip() for project_id in project.split(',') if project_id.strip()]
+    results = run_concurrently(load_one_project, projects_ids, max_workers=PROJECTS_CONCURRENCY)
+    errors = [err for _, err in results if err is not None]
+    if results and len(errors) == len(results):
+        raise errors[0]
+    frames = [df for df, _ in results if isinstance(df, pd.DataFrame) and len(df) != 0]
+    return pd.concat(frames, ignore_index=True) if frames else None
 
-    result = git.get_commits_details_and_size(since_date)
+
+@timer
+def get_git_commits(project: str, since_date: str, git_search: Optional[GitLabV4Search] = None, to_save=False) -> None | pd.DataFrame:
+    """Get commits' data for comma-separated GitLab projects."""
+    result = _load_projects(project, lambda git: git.get_commits_details_and_size(since_date), git_search)
     if isinstance(result, pd.DataFrame) and len(result) != 0:
         if to_save:
-            git_commits_output = f'{OUTPUT_FOLDER}commits_details_{project}.csv'
+            git_commits_output = f'{OUTPUT_FOLDER}commits_details_{project.replace(",", "_").replace(" ", "")}.csv'
             check_if_open(git_commits_output)
             result.to_csv(git_commits_output)
     else:
@@ -96,18 +119,13 @@ def get_git_commits(project: str, since_date: str, git_search: Optional[GitLabV4
 
 @timer
 def get_git_merge_requests(project: str, since_date: str, git_search: Optional[GitLabV4Search] = None, to_save=False) -> None | pd.DataFrame:
-    """Get merge requests' data for one GitLab project."""
-    if git_search is None or git_search.token is None:
-        git = GitLabV4(url=URL, project_id=project, default_branch_name='master', token=TOKEN)
-    else:
-        git = GitLabV4(url=git_search.url, project_id=project, default_branch_name="master", token=git_search.token)
-
-    result = git.get_all_merge_requests_details(since_date)
+    """Get merge requests' data for comma-separated GitLab projects."""
+    result = _load_projects(project, lambda git: git.get_all_merge_requests_details(since_date), git_search)
 
     if isinstance(result, pd.DataFrame) and len(result) != 0:
         if to_save:
             git_merge_requests_output = (
-                f"{OUTPUT_FOLDER}merge_requests_details_{project}.csv"
+                f"{OUTPUT_FOLDER}merge_requests_details_{project.replace(',', '_').replace(' ', '')}.csv"
             )
             check_if_open(git_merge_requests_output)
 
@@ -3,12 +3,23 @@
 import logging
 import time
 
-from urllib.parse import urlparse, parse_qs
-from typing import Optional
+from urllib.parse import urlencode, urlparse, parse_qs
+from typing import Callable, Optional
 from abc import ABC
 
 import requests
 
+from ..github.github_utils import get_rate_limit_resource, get_token_resources, select_token, token_hash
+from ..utils.cache import get_cache
+from ..utils.concurrency import run_concurrently
+
+
+GRAPHQL_URL = 'https://api.github.com/graphql'
+# Responses with validators (ETag, Last-Modified) are kept on disk to send conditional requests:
+# 304 Not Modified answers do not count against the rate limit
+RESPONSES_CACHE_MAX_SIZE = 256 * 1024 * 1024
+MAX_CONNECTION_ATTEMPTS = 3
+
 
 class GitHubBase(ABC):  # pylint: disable=too-few-public-methods
     """
@@ -19,7 +30,8 @@ class GitHubBase(ABC):  # pylint: disable=too-few-public-methods
     owner : str
         The owner of the repository.
     token : str
-        The token used to authenticate with the GitHub API.
+        The token used to authenticate with the GitHub API. Several comma-separated tokens make a pool,
+        requests are spread across them by remaining rate limits.
     base_url : str
         The base URL for the GitHub API for the specified repository.
     """
@@ -37,61 +49,137 @@ class GitHubBase(ABC):  # pylint: disable=too-few-public-methods
         """
         self.owner = owner
         self.token = token
+        self.tokens = [item.strip() for item in token.split(',') if item.strip()] if token else []
         self.base_url = 'https://api.github.com'
 
-    def _load_data(self, url_suffix: str, params: dict = None, per_page: int = 100) -> Optional[list | dict]:
-        """Loads data from the GitHub API."""
+    def _load_data(self, url_suffix: str, params: dict = None, per_page: int = 100,
+                   stop: Optional[Callable[[list], bool]] = None) -> Optional[list | dict]:
+        """
+        Loads data from the GitHub API. Pages are loaded until the last one or until the stop function returns True
+        for a loaded page (e.g. for a page of items sorted by date that is older than needed).
+        If the first page links the last one and there is no stop function, the remaining pages are loaded
+        concurrently.
+        """
         if params is None:
             params = {}
         page = 1
         data = []
         while True:
             url = f"{self.base_url}/{url_suffix}"
-            headers = {'Authorization': f'Bearer {self.token}'}
             params['per_page'] = per_page
             params['page'] = page
-            response = self._make_request(url, headers, params)
+            page_data, link_header = self._load_page(url, params)
 
             # In some cases, there is only on object in json
-            if not isinstance(response.json(), list):
-                return response.json()
+            if not isinstance(page_data, list):
+                return page_data
 
-            data.extend(response.json())
-            next_page = self._get_page_from_header(response)
+            data.extend(page_data)
+            if stop is not None and stop(page_data):
+                break
+            last_page = self._get_page_from_header(link_header, rel='last')
+            if stop is None and page == 1 and last_page and last_page > 2:
+                pages = run_concurrently(lambda number: self._load_page(url, dict(params, page=number))[0],
+                                         range(2, last_page + 1))
+                for page_data in pages:
+                    data.extend(page_data)
+                break
+            next_page = self._get_page_from_header(link_header)
             if not next_page:
                 break
             page = next_page
         return data
 
-    @staticmethod
-    def _make_request(url: str, headers: dict, params: dict) -> requests.Response:
-        """Makes a request to the GitHub API."""
-        response = None
+    def _load_page(self, url: str, params: dict) -> tuple[Optional[list | dict], Optional[str]]:
+        """
+        Loads one page of data and its Link header. Requests are conditional if the response is cached, and the
+        cached data is returned if it has not been modified.
+        More details on the page:
+        https://docs.github.com/en/rest/using-the-rest-api/best-practices-for-using-the-rest-api#use-conditional-requests-if-appropriate
+        """
+        cache = get_cache('github_responses')
+        key = f'{token_hash(self.token)}:{url}?{urlencode(sorted(params.items()))}'
+        cached = cache.get(key)
+        headers = {}
+        if cached and cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        elif cached and cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+        response = self._make_request(url, headers, params)
+        if cached and response.status_code == 304:
+            cache.touch(key)
+            return cached['data'], cached['link']
+
+        data, link_header = response.json(), response.headers.get('Link')
+        if response.headers.get('ETag') or response.headers.get('Last-Modified'):
+            cache.set(key, {'etag': response.headers.get('ETag'), 'data': data, 'link': link_header,
+                            'last_modified': response.headers.get('Last-Modified')})
+            cache.trim(RESPONSES_CACHE_MAX_SIZE)
+        return data, link_header
+
+    def _graphql_query(self, query: str, variables: dict) -> dict:
+        """
+        Runs a GraphQL query against the GitHub API and returns its data. Errors are logged if the query returned
+        partial data and raised if it returned nothing.
+        More details on the page: https://docs.github.com/en/graphql/guides/forming-calls-with-graphql
+        """
+        headers = {}
+        payload = {'query': query, 'variables': variables}
+        response = self._make_request(GRAPHQL_URL, headers, {}, method='POST', json=payload)
+        result = response.json()
+        if result.get('errors'):
+            if not result.get('data'):
+                raise ValueError(f"GraphQL query failed: {result['errors']}")
+            logging.warning('GraphQL query returned errors: %s', result['errors'])
+        return result['data']
+
+    def _make_request(  # pylint: disable=too-many-arguments
+            self, url: str, headers: dict, params: dict, method: str = 'GET', json: Optional[dict] = None,
+            token: Optional[str] = None) -> requests.Response:
+        """
+        Makes a request to the GitHub API with the token of the pool that has the most remaining requests (or the
+        given token). Requests made with a token share its pooled session, concurrency budget and rate limits.
+        Requests wait for the rate limit budget, rate limited requests are repeated with another token or after
+        the limit is reset, failed connections are retried a few times.
+        """
+        resource = get_rate_limit_resource(url)
+        connection_attempts = 0
         while True:
+            request_token = token or select_token(self.tokens, resource)
+            session, budget, rate_limit = get_token_resources(request_token)
+            rate_limit.wait(resource)
             try:
-                response = requests.get(url, headers=headers, params=params, timeout=30)
-                response.raise_for_status()
-                break
-            except requests.exceptions.RequestException as err:
-                if 'X-RateLimit-Reset' in response.headers and response.status_code == 403:
-                    reset_time = int(response.headers['X-RateLimit-Reset'])
-                    sleep_time = max(0, reset_time - int(time.time()))
-                    logging.info('Rate limit exceeded. Sleeping for %s seconds.', sleep_time)
-                    time.sleep(sleep_time)
-                else:
+                with budget:
+                    response = session.request(method, url, params=params, json=json, timeout=30,
+                                               headers=dict(headers, Authorization=f'Bearer {request_token}'))
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as err:
+                connection_attempts += 1
+                if connection_attempts >= MAX_CONNECTION_ATTEMPTS:
                     logging.error('Failed to load data from %s: %s', url, err)
                     raise err
-        return response
+                logging.warning('Failed to connect to %s: %s. Retrying...', url, err)
+                time.sleep(2 ** connection_attempts)
+                continue
+
+            if rate_limit.register_response(resource, response):
+                logging.info('Rate limit exceeded for %s. Waiting for the rate limit reset.', url)
+                continue
+            try:
+                response.raise_for_status()
+            except requests.exceptions.RequestException as err:
+                logging.error('Failed to load data from %s: %s', url, err)
+                raise err
+            return response
 
     @staticmethod
-    def _get_page_from_header(response: requests.Response) -> Optional[int]:
-        """Extracts the next page number from the Link header of a GitHub API response."""
-        link_header = response.headers.get('Link')
+    def _get_page_from_header(link_header: Optional[str], rel: str = 'next') -> Optional[int]:
+        """Extracts the next (or another linked) page number from the Link header of a GitHub API response."""
         next_page = None
         if link_header:
             links = link_header.split(', ')
             for link in links:
-                if 'rel="next"' in link:
+                if f'rel="{rel}"' in link:
                     next_url = link[link.index('<')+1:link.index('>')]
                     next_page = parse_qs(urlparse(next_url).query).get('page')
                     if next_page:
@@ -2,9 +2,47 @@
 
 import logging
 
+from typing import Optional
+
 import pandas as pd
 
 from ..github.github_base import GitHubBase
+from ..github.github_utils import define_branch_status
+from ..utils.concurrency import run_concurrently
+
+
+REPOSITORIES_SUMMARY_QUERY = """
+query ($owner: String!, $cursor: String) {
+  organization(login: $owner) {
+    repositories(first: 50, after: $cursor, orderBy: {field: PUSHED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        databaseId name description url homepageUrl pushedAt
+        defaultBranchRef { name }
+        refs(refPrefix: "refs/heads/", first: 100) {
+          pageInfo { hasNextPage endCursor }
+          nodes { target { ... on Commit { committedDate } } }
+        }
+      }
+    }
+  }
+}
+"""
+
+BRANCHES_QUERY = """
+query ($owner: String!, $repo: String!, $cursor: String) {
+  repository(owner: $owner, name: $repo) {
+    refs(refPrefix: "refs/heads/", first: 100, after: $cursor) {
+      pageInfo { hasNextPage endCursor }
+      nodes { target { ... on Commit { committedDate } } }
+    }
+  }
+}
+"""
+
+# Search qualifiers of pull requests states counted in the repositories summary
+PULL_REQUESTS_STATES = {'open': 'is:open', 'merged': 'is:merged', 'closed': 'is:closed is:unmerged'}
+PULL_REQUESTS_COUNT_BATCH = 20
 
 
 class GitHubGetOrgLvl(GitHubBase):  # pylint: disable=too-few-public-methods
@@ -22,8 +60,10 @@ class GitHubGetOrgLvl(GitHubBase):  # pylint: disable=too-few-public-methods
 
     Methods
     -------
-    extract_repos_list()
+    extract_repos_list(pushed_after)
         Extracts repositories list (their ids and names) that can be accessed.
+    extract_repos_summary(pushed_after)
+        Extracts repositories pushed after the date with their branches statuses and pull requests counts.
     """
 
     def __init__(self, owner, token):
@@ -33,13 +73,19 @@ class GitHubGetOrgLvl(GitHubBase):  # pylint: disable=too-few-public-methods
         super().__init__(owner, token)
         self.base_url = self.base_url + f'/orgs/{self.owner}'
 
-    def extract_repos_list(self) -> pd.DataFrame:
+    def extract_repos_list(self, pushed_after: Optional[str] = None) -> pd.DataFrame:
         """
-        Extracts repositories list from the GitHub API. Details on the page:
+        Extracts repositories list from the GitHub API. If pushed_after is set, repositories are listed from the
+        last pushed one and the listing stops at the first page with repositories pushed before the date
+        (the result still has to be filtered by the date). Details on the page:
         https://docs.github.com/en/rest/repos/repos?apiVersion=2022-11-28#list-organization-repositories
         """
         logging.info("Starting repos list extraction...")
-        data_raw = self._load_data('repos')
+        if pushed_after:
+            data_raw = self._load_data('repos', params={'sort': 'pushed', 'direction': 'desc'},
+                                       stop=lambda page: not page or (page[-1].get('pushed_at') or '') < pushed_after)
+        else:
+            data_raw = self._load_data('repos')
         data = []
         for repo in data_raw:
             repo_data = self._extract_repos_attr(repo)
@@ -48,6 +94,82 @@ class GitHubGetOrgLvl(GitHubBase):  # pylint: disable=too-few-public-methods
         logging.info('Repos list extraction completed.')
         return df_repos
 
+    def extract_repos_summary(self, pushed_after: str) -> pd.DataFrame:
+        """
+        Extracts repositories pushed after the date with the numbers of active and stale branches (by the last
+        commit date) and the numbers of open, closed and merged pull requests created after the date.
+        Repositories are loaded with GraphQL 50 per request, pull requests are counted with GraphQL search.
+        More details on the page: https://docs.github.com/en/graphql/reference/objects#repository
+        """
+        logging.info("Starting repos summary extraction...")
+        repos = []
+        variables = {'owner': self.owner, 'cursor': None}
+        while True:
+            data = self._graphql_query(REPOSITORIES_SUMMARY_QUERY, variables)
+            if not data.get('organization'):
+                raise ValueError(f'Organization {self.owner} is not available via GraphQL')
+            repositories = data['organization'].get('repositories') or {}
+            nodes = [node for node in repositories.get('nodes') or [] if node]
+            # Repositories are sorted by the push date, so older ones are not loaded
+            repos += [node for node in nodes if (node.get('pushedAt') or '') >= pushed_after]
+            page_info = repositories.get('pageInfo') or {}
+            if not page_info.get('hasNextPage') or not nodes or (nodes[-1].get('pushedAt') or '') < pushed_after:
+                break
+            variables['cursor'] = page_info['endCursor']
+
+        if not repos:
+            return pd.DataFrame()
+        df_repos = pd.DataFrame([self._extract_repos_summary_attr(repo) for repo in repos])
+        df_repos = df_repos.join(pd.DataFrame(run_concurrently(self._count_branches_statuses, repos)))
+        pull_requests_counts = {}
+        repos_names = df_repos['repository_name'].tolist()
+        batches = [repos_names[i:i + PULL_REQUESTS_COUNT_BATCH]
+                   for i in range(0, len(repos_names), PULL_REQUESTS_COUNT_BATCH)]
+        for counts in run_concurrently(lambda batch: self._count_pull_requests(batch, pushed_after), batches):
+            pull_requests_counts.update(counts)
+        df_repos = df_repos.join(pd.DataFrame([pull_requests_counts[name] for name in repos_names]))
+        df_repos['pull_req_total'] = df_repos[[f'pull_req_{state}' for state in PULL_REQUESTS_STATES]].sum(axis=1)
+        logging.info('Repos summary extraction completed.')
+        return df_repos
+
+    def _count_branches_statuses(self, repo: dict) -> dict:
+        """Counts active and stale branches of a repository loading the branches that did not fit the first page."""
+        refs = repo.get('refs') or {}
+        commits_dates = [((node or {}).get('target') or {}).get('committedDate') for node in refs.get('nodes') or []]
+        page_info = refs.get('pageInfo') or {}
+        while page_info.get('hasNextPage'):
+            variables = {'owner': self.owner, 'repo': repo['name'], 'cursor': page_info['endCursor']}
+            refs = (self._graphql_query(BRANCHES_QUERY, variables).get('repository') or {}).get('refs') or {}
+            commits_dates += [((node or {}).get('target') or {}).get('committedDate')
+                              for node in refs.get('nodes') or []]
+            page_info = refs.get('pageInfo') or {}
+        statuses = [define_branch_status(date) for date in commits_dates if date]
+        return {'active': statuses.count('active'), 'stale': statuses.count('stale')}
+
+    def _count_pull_requests(self, repos_names: list[str], created_after: str) -> dict:
+        """Counts pull requests created after the date by state for several repositories in one search query."""
+        fields = []
+        for i, repo in enumerate(repos_names):
+            for state, qualifier in PULL_REQUESTS_STATES.items():
+                search = f'repo:{self.owner}/{repo} is:pr {qualifier} created:>={created_after}'
+                fields.append(f'r{i}_{state}: search(query: "{search}", type: ISSUE, first: 1) {{ issueCount }}')
+        data = self._graphql_query('query {\n' + '\n'.join(fields) + '\n}', {})
+        return {repo: {f'pull_req_{state}': (data.get(f'r{i}_{state}') or {}).get('issueCount', 0)
+                       for state in PULL_REQUESTS_STATES}
+                for i, repo in enumerate(repos_names)}
+
+    @staticmethod
+    def _extract_repos_summary_attr(repository: dict) -> dict:
+        """Extracts the same attributes from a GraphQL repository object as from a REST one."""
+        return {
+            'repository_id': repository.get('databaseId'),
+            'repository_name': repository.get('name'),
+            'description': repository.get('description'),
+            'http_url_to_repo': repository.get('url'),
+            'web_url': repository.get('homepageUrl'),
+            'default_branch': (repository.get('defaultBranchRef') or {}).get('name'),
+        }
+
     @staticmethod
     def _extract_repos_attr(repository: dict) -> dict:
         """Extracts relevant attributes from a repository object."""
@@ -3,14 +3,44 @@
 import logging
 
 from typing import Optional
-from datetime import datetime
 
 import pandas as pd
 import requests
 
 from ..github.github_base import GitHubBase
-from ..utils.convert_to_datetime import string_to_datetime
+from ..github.github_utils import define_branch_status, is_token_validated, set_token_validated
+from ..utils.cache import get_cache, get_many_or_load
 from ..utils.check_input import check_input_date
+from ..utils.concurrency import run_concurrently
+
+
+COMMITS_HISTORY_QUERY = """
+query ($owner: String!, $repo: String!, $since: GitTimestamp, $cursor: String) {
+  repository(owner: $owner, name: $repo) {
+    object(expression: "HEAD") {
+      ... on Commit {
+        history(first: 100, since: $since, after: $cursor) {
+          pageInfo { hasNextPage endCursor }
+          nodes { oid additions deletions }
+        }
+      }
+    }
+  }
+}
+"""
+
+PULL_REQUESTS_COMMIT_DATES_QUERY = """
+query ($owner: String!, $repo: String!) {
+  repository(owner: $owner, name: $repo) {
+    PULL_REQUESTS
+  }
+}
+fragment commitDates on PullRequest {
+  first: commits(first: 1) { nodes { commit { committedDate } } }
+  last: commits(last: 1) { nodes { commit { committedDate } } }
+}
+"""
+PULL_REQUESTS_COMMITS_BATCH = 100
 
 
 class GitHubGetReposLvl(GitHubBase):
@@ -47,17 +77,16 @@ class GitHubGetReposLvl(GitHubBase):
         self.repo = repo
         self.base_url = f'https://api.github.com/repos/{self.owner}/{self.repo}'
 
-        # Validate credentials
-        try:
-            test_response = requests.get(
-                self.base_url,
-                headers={'Authorization': f'Bearer {self.token}'},
-                timeout=30
-            )
-            test_response.raise_for_status()
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Failed to authenticate: {str(e)}")
-            raise ValueError("Invalid credentials or repository access") from e
+        # Validate credentials once per token
+        for pool_token in self.tokens:
+            if is_token_validated(pool_token):
+                continue
+            try:
+                self._make_request(self.base_url, {}, {}, token=pool_token)
+            except requests.exceptions.RequestException as e:
+                logging.error(f"Failed to authenticate: {str(e)}")
+                raise ValueError("Invalid credentials or repository access") from e
+            set_token_validated(pool_token)
 
     def extract_commit_data(self, since_date: str) -> pd.DataFrame:
         """
@@ -67,23 +96,24 @@ class GitHubGetReposLvl(GitHubBase):
         check_input_date(since_date)
         logging.info("Starting commits data extraction...")
         data_raw = self._load_data('commits', params={'since': since_date})
-        data = []
-        for commit in data_raw:
-            commit_data = self._extract_commit_attr(commit)
-            commit_data['commit_size'] = self._get_commit_size(commit_data['id'])
-            data.append(commit_data)
+        data = [self._extract_commit_attr(commit) for commit in data_raw]
+        commits_sizes = self._get_commits_sizes([commit_data['id'] for commit_data in data], since_date)
+        for commit_data in data:
+            commit_data['commit_size'] = commits_sizes.get(commit_data['id'])
         df_commits = pd.DataFrame(data)
         logging.info('Commits data extraction completed.')
         return df_commits
 
-    def extract_pull_requests_data(self, since_date: str) -> pd.DataFrame:
+    def extract_pull_requests_data(self, since_date: str, with_commit_dates: bool = True) -> pd.DataFrame:
         """
         Extracts pull requests data (open and closed) from the GitHub API since the specified date.
+        If with_commit_dates is True, dates of the first and the last commits of pull requests are added.
         More details on the page: https://docs.github.com/en/rest/pulls/pulls?apiVersion=2022-11-28#list-pull-requests
         """
         check_input_date(since_date)
-        # logging.info('Starting pull requests data extraction for the repository "%s"...', self.repo)
-        data_raw = self._load_data('pulls', params={'state': 'all'})
+        # Pull requests are sorted from the newest, so paging stops at the first page with older ones
+        data_raw = self._load_data('pulls', params={'state': 'all', 'sort': 'created', 'direction': 'desc'},
+                                   stop=lambda page: not page or (page[-1].get('created_at') or '')[:10] < since_date)
 
         if not data_raw:
             logging.info('No pull requests found for the repository %s.', self.repo)
@@ -97,13 +127,61 @@ class GitHubGetReposLvl(GitHubBase):
         if len(data) == 0:
             return pd.DataFrame()
         df_pull_requests = pd.DataFrame(data)
-        df_pull_requests['created_at_datetime'] = df_pull_requests.apply(
-            lambda x: string_to_datetime(x['created_at'][:10]), axis=1)
-        df_pull_requests = df_pull_requests[df_pull_requests['created_at_datetime'] >= string_to_datetime(since_date)]
-        df_pull_requests = df_pull_requests.drop(columns=['created_at_datetime'])
+        created_at = pd.to_datetime(df_pull_requests['created_at'].str[:10], errors='coerce')
+        df_pull_requests = df_pull_requests[created_at >= pd.to_datetime(since_date)]
+        if with_commit_dates:
+            df_pull_requests = self._add_commit_dates(df_pull_requests)
+        df_pull_requests = df_pull_requests.drop(columns=['number'])
         logging.info('Pull requests data extraction for the repository %s completed.', self.repo)
         return df_pull_requests
 
+    def _add_commit_dates(self, df_pull_requests: pd.DataFrame) -> pd.DataFrame:
+        """
+        Adds dates of the first and the last commits to pull requests. Dates are loaded with GraphQL for up to
+        100 pull requests per request. Dates of closed (and merged) pull requests do not change, so they are cached.
+        """
+        numbers = [int(number) for number in df_pull_requests['number'].dropna()]
+        keys = {number: f'{self.owner}/{self.repo}/{number}' for number in numbers}
+        closed = set(df_pull_requests.loc[df_pull_requests['closed_at'].notna(), 'number'].dropna().astype(int))
+
+        def load_commit_dates(missing):
+            batches = [missing[i:i + PULL_REQUESTS_COMMITS_BATCH]
+                       for i in range(0, len(missing), PULL_REQUESTS_COMMITS_BATCH)]
+            commit_dates = {}
+            try:
+                for batch_dates in run_concurrently(self._load_commit_dates, batches):
+                    commit_dates.update(batch_dates)
+            except (requests.exceptions.RequestException, ValueError) as err:
+                logging.warning('Failed to load pull requests commits dates for the repository %s: %s', self.repo, err)
+            return commit_dates
+
+        commit_dates = get_many_or_load(get_cache('github_pull_requests_commit_dates'), keys, load_commit_dates,
+                                        keep=lambda number, _: number in closed)
+        dates = [commit_dates.get(number) or [None, None] for number in df_pull_requests['number']]
+        df_pull_requests = df_pull_requests.copy()
+        df_pull_requests['first_commit_date'] = [first for first, _ in dates]
+        df_pull_requests['last_commit_date'] = [last for _, last in dates]
+        return df_pull_requests
+
+    def _load_commit_dates(self, numbers: list[int]) -> dict:
+        """
+        Loads committed dates of the first and the last commits of pull requests in one GraphQL request.
+        More details on the page: https://docs.github.com/en/graphql/reference/objects#pullrequest
+        """
+        fields = '\n'.join(f'pr{number}: pullRequest(number: {number}) {{ ...commitDates }}' for number in numbers)
+        data = self._graphql_query(PULL_REQUESTS_COMMIT_DATES_QUERY.replace('PULL_REQUESTS', fields),
+                                   {'owner': self.owner, 'repo': self.repo})
+        repository = data.get('repository') or {}
+        commit_dates = {}
+        for number in numbers:
+            pull_request = repository.get(f'pr{number}')
+            if not pull_request:
+                continue
+            first = ((pull_request.get('first') or {}).get('nodes') or [{}])[0].get('commit') or {}
+            last = ((pull_request.get('last') or {}).get('nodes') or [{}])[0].get('commit') or {}
+            commit_dates[number] = [first.get('committedDate'), last.get('committedDate')]
+        return commit_dates
+
     def extract_branches_data(self) -> pd.DataFrame:
         """
         Extracts branches data from the GitHub API.
@@ -116,16 +194,13 @@ class GitHubGetReposLvl(GitHubBase):
             logging.info('No branches found.')
             return pd.DataFrame()
         df_branches = pd.DataFrame(data_raw)
-        branches_details = []
-        for branch in df_branches['name'].tolist():
-            branch_data = self.extract_one_branch_data(branch)
-            branches_details += [branch_data]
+        branches_details = run_concurrently(self.extract_one_branch_data, df_branches['name'].tolist())
         df_branches = df_branches.merge(pd.DataFrame(branches_details), on='name', how='left')
         if df_branches.empty:
             return df_branches
         df_branches['last_commit_date'] = df_branches['commit_y'].apply(
             lambda x: x.get('commit', {}).get('committer', {}).get('date'))
-        df_branches['branch_status'] = df_branches['last_commit_date'].apply(self._define_active_or_stale_branch)
+        df_branches['branch_status'] = df_branches['last_commit_date'].apply(define_branch_status)
         # logging.info('Branches data extraction completed.')
         return df_branches
 
@@ -153,6 +228,7 @@ class GitHubGetReposLvl(GitHubBase):
         if not pull_req:
             logging.warning("Received empty pull request data")
             return {
+                "number": None,
                 "project_id": None,
                 "created_at": None,
                 "merged_at": None,
@@ -165,6 +241,7 @@ class GitHubGetReposLvl(GitHubBase):
         repo = head.get("repo") or {}
 
         return {
+            "number": pull_req.get("number"),
             "project_id": repo.get("id"),
             "created_at": pull_req.get("created_at"),
             "merged_at": pull_req.get("merged_at"),
@@ -185,6 +262,47 @@ class GitHubGetReposLvl(GitHubBase):
             "message": commit_info.get("message").encode('utf8'),
         }
 
+    def _get_commits_sizes(self, commits_shas: list[str], since_date: str) -> dict:
+        """
+        Gets sizes (additions plus deletions) of commits. Commits are immutable, so sizes are cached by SHA.
+        Sizes of new commits are loaded in batches from the GraphQL commits history, commits that are not found
+        there (e.g. if GraphQL is not available) are requested one by one from the REST API.
+        """
+        keys = {sha: f'{self.owner}/{self.repo}/{sha}' for sha in commits_shas}
+
+        def load_commits_sizes(missing):
+            missing = set(missing)
+            commits_sizes = {}
+            try:
+                commits_sizes.update(self._load_commits_sizes_from_history(since_date, missing))
+            except (requests.exceptions.RequestException, ValueError) as err:
+                logging.warning('Failed to load commits sizes via GraphQL for the repository %s: %s', self.repo, err)
+            for sha in missing - set(commits_sizes):
+                commits_sizes[sha] = self._get_commit_size(sha)
+            return commits_sizes
+
+        return get_many_or_load(get_cache('github_commits_sizes'), keys, load_commits_sizes)
+
+    def _load_commits_sizes_from_history(self, since_date: str, commits_shas: set[str]) -> dict:
+        """
+        Loads sizes of commits from the GraphQL history of the default branch (100 commits per request) until
+        all requested commits are found.
+        More details on the page: https://docs.github.com/en/graphql/reference/objects#commit
+        """
+        commits_sizes = {}
+        variables = {'owner': self.owner, 'repo': self.repo, 'since': f'{since_date}T00:00:00Z', 'cursor': None}
+        while True:
+            data = self._graphql_query(COMMITS_HISTORY_QUERY, variables)
+            history = (((data.get('repository') or {}).get('object') or {}).get('history')) or {}
+            for node in history.get('nodes') or []:
+                if node['oid'] in commits_shas:
+                    commits_sizes[node['oid']] = node['additions'] + node['deletions']
+            page_info = history.get('pageInfo') or {}
+            if not page_info.get('hasNextPage') or len(commits_sizes) == len(commits_shas):
+                break
+            variables['cursor'] = page_info['endCursor']
+        return commits_sizes
+
     def _get_commit_size(self, commit_sha: str) -> Optional[int]:
         """Fetches the size of a commit from the GitHub API."""
         data = self._load_data(f'commits/{commit_sha}')
@@ -197,11 +315,3 @@ class GitHubGetReposLvl(GitHubBase):
             "name": branch.get("name", {}),
             "last_commit_date": branch.get("commit", {}).get("date", {}),
         }
-
-    @staticmethod
-    def _define_active_or_stale_branch(commit_date: str):
-        """Defines if a branch is active or stale."""
-        commit_date = datetime.strptime(commit_date, '%Y-%m-%dT%H:%M:%SZ')
-        if (datetime.utcnow() - commit_date).days <= 30:
-            return 'active'
-        return 'stale'
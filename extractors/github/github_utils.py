@@ -0,0 +1,174 @@
+"""Utils for GitHub."""
+import logging
+import threading
+import time
+
+from datetime import datetime
+
+import requests
+
+from ..utils.http_session import credential_hash, get_shared_resources
+
+
+TOKEN_CONCURRENCY = 10
+# Requests are spread evenly until the reset when less than this share of the rate limit remains
+PACING_THRESHOLD = 0.1
+# GitHub recommends waiting at least a minute after hitting a secondary rate limit without Retry-After
+SECONDARY_LIMIT_WAIT = 60
+# A branch is active if its last commit was made during this number of days
+ACTIVE_BRANCH_DAYS = 30
+_RATE_LIMITS = {}
+_VALIDATED_TOKENS = set()
+_TOKENS_LOCK = threading.Lock()
+
+
+def token_hash(token: str) -> str:
+    """Get a short hash of a token to refer to it in cache keys and logs without revealing it."""
+    return credential_hash(token)
+
+
+def define_branch_status(commit_date: str) -> str:
+    """Defines if a branch is active (has commits during the last ACTIVE_BRANCH_DAYS days) or stale."""
+    commit_date = datetime.strptime(commit_date[:19], '%Y-%m-%dT%H:%M:%S')
+    if (datetime.utcnow() - commit_date).days <= ACTIVE_BRANCH_DAYS:
+        return 'active'
+    return 'stale'
+
+
+def get_token_resources(token: str) -> tuple[requests.Session, threading.BoundedSemaphore, 'RateLimitBudget']:
+    """
+    Get a pooled session, a concurrency budget and a rate limit budget shared by all requests made with the token.
+    The concurrency budget limits the number of requests sent with the token at the same time.
+    """
+    key = token_hash(token)
+    session, budget = get_shared_resources(('github', key), ('github', key), TOKEN_CONCURRENCY)
+    with _TOKENS_LOCK:
+        if key not in _RATE_LIMITS:
+            _RATE_LIMITS[key] = RateLimitBudget()
+        return session, budget, _RATE_LIMITS[key]
+
+
+def get_rate_limit_metrics() -> dict:
+    """Get the remaining rate limit of every token used in the process (tokens are referred to by their hashes)."""
+    with _TOKENS_LOCK:
+        rate_limits = dict(_RATE_LIMITS)
+    return {key: rate_limit.get_metrics() for key, rate_limit in rate_limits.items()}
+
+
+def select_token(tokens: list[str], resource: str = 'core') -> str:
+    """
+    Select a token of the pool for the next request: the one with the most remaining requests among tokens that
+    can be used right away, or the one that becomes available first if all tokens are exhausted.
+    """
+    if len(tokens) == 1:
+        return tokens[0]
+    return min(tokens, key=lambda token: get_token_resources(token)[2].get_availability(resource))
+
+
+def get_rate_limit_resource(url: str) -> str:
+    """Get the name of the rate limit the request to the URL counts against."""
+    if url.endswith('/graphql'):
+        return 'graphql'
+    if '/search/' in url:
+        return 'search'
+    return 'core'
+
+
+def is_token_validated(token: str) -> bool:
+    """Check if the token has already been validated in the process."""
+    with _TOKENS_LOCK:
+        return token_hash(token) in _VALIDATED_TOKENS
+
+
+def set_token_validated(token: str) -> None:
+    """Remember that the token is valid, so it is not validated again."""
+    with _TOKENS_LOCK:
+        _VALIDATED_TOKENS.add(token_hash(token))
+
+
+class RateLimitBudget:
+    """
+    Rate limits of one token shared by all workers using it. The state is updated from the X-RateLimit-* headers
+    of every response. Requests wait until the reset when the limit is exhausted, are spread evenly until the reset
+    when it is close to being exhausted, and wait for Retry-After (or a minute) after a secondary rate limit.
+    More details on the page:
+    https://docs.github.com/en/rest/using-the-rest-api/rate-limits-for-the-rest-api
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._limits = {}
+        self._next_request_at = {}
+        self._blocked_until = 0.0
+
+    def wait(self, resource: str = 'core') -> None:
+        """Wait until a request counting against the resource limit can be sent and reserve it."""
+        while True:
+            with self._lock:
+                delay = self._get_delay(resource, time.time())
+                if delay <= 0:
+                    if resource in self._limits:
+                        self._limits[resource]['remaining'] -= 1
+                    return
+            logging.info('GitHub rate limit: waiting %.1f seconds before the next request.', delay)
+            time.sleep(delay)
+
+    def _get_delay(self, resource: str, now: float) -> float:
+        """Get the time to wait before the next request counting against the resource limit."""
+        if self._blocked_until > now:
+            return self._blocked_until - now
+        limit = self._limits.get(resource)
+        if not limit or limit['reset'] <= now:
+            return 0
+        if limit['remaining'] <= 0:
+            return limit['reset'] - now + 1
+        if limit['remaining'] < limit['limit'] * PACING_THRESHOLD:
+            next_request_at = self._next_request_at.get(resource, 0)
+            if next_request_at > now:
+                return next_request_at - now
+            self._next_request_at[resource] = now + (limit['reset'] - now) / limit['remaining']
+        return 0
+
+    def get_availability(self, resource: str = 'core') -> tuple[float, float]:
+        """Get the time to wait before the next request and the negated number of remaining requests (to sort by)."""
+        with self._lock:
+            now = time.time()
+            if self._blocked_until > now:
+                return self._blocked_until - now, 0
+            limit = self._limits.get(resource)
+            if not limit or limit['reset'] <= now:
+                return 0, -float('inf')
+            if limit['remaining'] <= 0:
+                return limit['reset'] - now + 1, 0
+            return 0, -limit['remaining']
+
+    def register_response(self, resource: str, response: requests.Response) -> bool:
+        """Update the limits from the response headers. Return True if the request was rate limited."""
+        headers = response.headers
+        now = time.time()
+        with self._lock:
+            if 'X-RateLimit-Remaining' in headers and 'X-RateLimit-Reset' in headers:
+                resource = headers.get('X-RateLimit-Resource', resource)
+                limit = {'limit': int(headers.get('X-RateLimit-Limit', 0)),
+                         'remaining': int(headers['X-RateLimit-Remaining']),
+                         'reset': int(headers['X-RateLimit-Reset'])}
+                current = self._limits.get(resource)
+                # Responses of concurrent requests may come out of order
+                if current and current['reset'] == limit['reset']:
+                    limit['remaining'] = min(limit['remaining'], current['remaining'])
+                self._limits[resource] = limit
+            if response.status_code not in (403, 429):
+                return False
+            if 'Retry-After' in headers:
+                self._blocked_until = max(self._blocked_until, now + int(headers['Retry-After']))
+                return True
+            if headers.get('X-RateLimit-Remaining') == '0':
+                return True
+            if response.status_code == 429 or 'secondary rate limit' in response.text.lower():
+                self._blocked_until = max(self._blocked_until, now + SECONDARY_LIMIT_WAIT)
+                return True
+        return False
+
+    def get_metrics(self) -> dict:
+        """Get the limit, remaining requests and reset time (Unix seconds) of every rate limit resource."""
+        with self._lock:
+            return {resource: dict(limit) for resource, limit in self._limits.items()}
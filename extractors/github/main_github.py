@@ -5,6 +5,7 @@ import os
 from typing import Optional
 
 import pandas as pd
+import requests
 
 from ..github.github_repo import GitHubGetReposLvl
 from ..github.github_org import GitHubGetOrgLvl
@@ -13,7 +14,8 @@ from ..utils.read_config import GitHubConfig
 from ..utils.outliers import get_outliers_upper_bound
 from ..utils.check_input import check_if_open, check_input_date
 from ..utils.timer import timer
-from ..utils.convert_to_datetime import string_to_datetime
+from ..utils.concurrency import run_concurrently
+from ..utils.transform import concat_results, strings_to_datetime
 from ..github.github_transform import calculate_pull_req_statistic, add_pull_req_statistic_to_repos
 
 CONFIG_PATH = './config.yml'
@@ -22,6 +24,16 @@ if os.path.exists(CONFIG_PATH):
     GITHUB_CREDS = GitHubConfig(CONFIG_PATH)
     OWNER, TOKEN = GITHUB_CREDS.owner, GITHUB_CREDS.token
 
+# Requests of all repositories share the token session and concurrency budget (see github_utils)
+REPOS_CONCURRENCY = 8
+
+
+def _get_repo_client(repo: str, git: Optional[GitHubGetOrgLvl] = None) -> GitHubGetReposLvl:
+    """Creates a client for the repository with credentials of the organization client or the config."""
+    if git is not None:
+        return GitHubGetReposLvl(git.owner, git.token, repo)
+    return GitHubGetReposLvl(OWNER, TOKEN, repo)
+
 
 @timer
 def extract_commits_from_multiple_repos(repos: str, since_date: str, git: Optional[GitHubGetOrgLvl] = None,  to_save=False) -> pd.DataFrame | None:
@@ -37,14 +49,9 @@ def extract_commits_from_multiple_repos(repos: str, since_date: str, git: Option
         The date to start extracting commits from, in ISO 8601 format.
     """
     repos_list = [item.strip() for item in repos.split(',')]
-    df_commits = pd.DataFrame()
-    for repo in repos_list:
-        if git is not None:
-            git_repo = GitHubGetReposLvl(git.owner, git.token, repo)
-        else:
-            git_repo = GitHubGetReposLvl(OWNER, TOKEN, repo)
-        result = git_repo.extract_commit_data(since_date)
-        df_commits = pd.concat([df_commits, result], axis=0)
+    df_commits = concat_results(run_concurrently(
+        lambda repo: _get_repo_client(repo, git).extract_commit_data(since_date), repos_list,
+        max_workers=REPOS_CONCURRENCY))
 
     if df_commits.empty:
         logging.info('There are no commits for the selected period!')
@@ -61,7 +68,8 @@ def extract_commits_from_multiple_repos(repos: str, since_date: str, git: Option
 
 
 @timer
-def extract_pull_requests_from_multiple_repos(repos: str, since_date: str, git: Optional[GitHubGetOrgLvl] = None) -> pd.DataFrame:
+def extract_pull_requests_from_multiple_repos(repos: str, since_date: str, git: Optional[GitHubGetOrgLvl] = None,
+                                              with_commit_dates: bool = True) -> pd.DataFrame:
     """
     Extracts pull request data from multiple GitHub repositories since the specified date.
 
@@ -71,26 +79,18 @@ def extract_pull_requests_from_multiple_repos(repos: str, since_date: str, git:
         The string containing repositories names to extract data from, separated by commas.
     since_date : str
         The date to start extracting pull requests from, in ISO 8601 format.
+    with_commit_dates : bool
+        Whether to add dates of the first and the last commits of pull requests.
     """
-    df_pull_requests = pd.DataFrame()
     repos_list = [item.strip() for item in repos.split(',')]
-
-    for repo in repos_list:
-        if git is not None:
-            git_repos = GitHubGetReposLvl(git.owner, git.token, repo)
-        else:
-            git_repos = GitHubGetReposLvl(OWNER, TOKEN, repo)
-
-        result = git_repos.extract_pull_requests_data(since_date)
-        df_pull_requests = pd.concat([df_pull_requests, result], axis=0)
+    df_pull_requests = concat_results(run_concurrently(
+        lambda repo: _get_repo_client(repo, git).extract_pull_requests_data(since_date, with_commit_dates),
+        repos_list, max_workers=REPOS_CONCURRENCY))
 
     if df_pull_requests.empty:
         logging.info("There are no pull requests for the selected period!")
         return df_pull_requests
 
-    # Add empty columns that are in the GitLab data
-    df_pull_requests[['first_commit_date', 'last_commit_date']] = None
-
     logging.info('Pull requests data has been extracted.')
     return df_pull_requests
 
@@ -114,12 +114,12 @@ def extract_repositories_list(pushed_after, git: Optional[GitHubGetOrgLvl] = Non
     check_input_date(pushed_after)
     if git is None:
         git = GitHubGetOrgLvl(OWNER, TOKEN)
-    result = git.extract_repos_list()
+    result = git.extract_repos_list(pushed_after)
     if result.empty:
         return pd.DataFrame()
 
-    result['pushed_at'] = result.apply(lambda x: string_to_datetime(x['pushed_at']), axis=1)
-    result = result[result['pushed_at'] >= string_to_datetime(pushed_after)]
+    result['pushed_at'] = strings_to_datetime(result['pushed_at'])
+    result = result[result['pushed_at'] >= pd.to_datetime(pushed_after)]
     logging.info('Repositories data has been extracted.')
 
     return result
@@ -145,39 +145,49 @@ def extract_repositories_extended_data(pushed_after, git: Optional[GitHubGetOrgL
     Checks if the file with the same name is not open.
     """
     check_input_date(pushed_after)
-   
-    result = extract_repositories_list(pushed_after, git=git)
+    if git is None:
+        git = GitHubGetOrgLvl(OWNER, TOKEN)
+    try:
+        result = git.extract_repos_summary(pushed_after)
+    except (requests.exceptions.RequestException, ValueError) as err:
+        logging.warning('Failed to extract the repositories summary via GraphQL: %s', err)
+        result = _extract_repositories_extended_data_rest(pushed_after, git)
     if result.empty:
         logging.info('There are no repositories for the selected period!')
         return result
 
+    if to_save:
+        output_file = f'{OUTPUT_FOLDER}github_repos_extended_info.csv'
+        check_if_open(output_file)
+        result.to_csv(output_file, index=False)
+        logging.info('Extended information on the repositories you have access to has been downloaded to '
+                 'the folder %s', OUTPUT_FOLDER)
+
+    return result
+
+
+def _extract_repositories_extended_data_rest(pushed_after, git: GitHubGetOrgLvl) -> pd.DataFrame:
+    """Extracts repositories with branches and pull requests statistics requesting every repository via REST."""
+    result = extract_repositories_list(pushed_after, git=git)
+    if result.empty:
+        return result
+
     repos_names = result['repository_name'].tolist()
 
-    branches_all_repos = []
-    for repo in repos_names:
-        if git is not None:
-            git_repo = GitHubGetReposLvl(git.owner, git.token, repo)
-        else:
-            git_repo = GitHubGetReposLvl(OWNER, TOKEN, repo)
-        branches = git_repo.extract_branches_data()
+    def branches_count_one_repo(repo):
+        branches = _get_repo_client(repo, git).extract_branches_data()
         if branches.empty:
-            continue
+            return None
         branches_count_status = branches['branch_status'].value_counts()
         branches_count_status['repository_name'] = repo
-        branches_all_repos += [branches_count_status]
-    branches_all_repos = pd.DataFrame(branches_all_repos)
+        return branches_count_status
+
+    branches_all_repos = run_concurrently(branches_count_one_repo, repos_names, max_workers=REPOS_CONCURRENCY)
+    branches_all_repos = pd.DataFrame([branches for branches in branches_all_repos if branches is not None])
     if not branches_all_repos.empty:
         result = result.merge(branches_all_repos, on='repository_name', how='left')
 
-    pull_req = extract_pull_requests_from_multiple_repos(','.join(repos_names), pushed_after, git=git)
+    pull_req = extract_pull_requests_from_multiple_repos(','.join(repos_names), pushed_after, git=git,
+                                                         with_commit_dates=False)
     pull_req_stats = calculate_pull_req_statistic(pull_req)
-    result = add_pull_req_statistic_to_repos(result, pull_req_stats)
-
-    if to_save:
-        output_file = f'{OUTPUT_FOLDER}github_repos_extended_info.csv'
-        check_if_open(output_file)
-        result.to_csv(output_file, index=False)
-        logging.info('Extended information on the repositories you have access to has been downloaded to '
-                 'the folder %s', OUTPUT_FOLDER)
-
-    return result
+    return add_pull_req_statistic_to_repos(result, pull_req_stats)
@@ -0,0 +1,189 @@
+"""This module contains a persistent key-value cache for extracted data and metadata."""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from typing import Any, Callable, Iterable, Optional
+
+from ..utils.concurrency import run_concurrently
+from ..utils.constants import OUTPUT_FOLDER
+
+
+CACHE_FOLDER = {'path': os.path.join(OUTPUT_FOLDER, 'cache')}
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+# Metadata (projects, repositories, teams etc.) is fresh for an hour and can be served stale for a day
+# while it is being refreshed in the background
+METADATA_TTL = 60 * 60
+METADATA_STALE_TTL = 24 * 60 * 60
+_REFRESHING = set()
+_REFRESHING_LOCK = threading.Lock()
+
+# A trimmed cache keeps this share of its maximum size, so it is not trimmed again on the next write
+TRIM_RATIO = 0.9
+
+
+def set_cache_folder(path: str) -> None:
+    """Set the folder where cache files are stored (e.g. a sub-folder of the plugin base_path)."""
+    CACHE_FOLDER['path'] = path
+
+
+def get_cache(name: str) -> 'PersistentCache':
+    """Return a cache shared by all callers in the process for the name in the current cache folder."""
+    path = os.path.join(CACHE_FOLDER['path'], f'{name}.sqlite')
+    with _CACHES_LOCK:
+        if path not in _CACHES:
+            _CACHES[path] = PersistentCache(path)
+        return _CACHES[path]
+
+
+def get_or_load(cache: 'PersistentCache', key: str, loader: Callable[[], Any],
+                ttl: float = METADATA_TTL, stale_ttl: float = METADATA_STALE_TTL) -> Any:
+    """
+    Return a cached value if it is younger than ttl. A value that is older, but still within stale_ttl, is returned
+    as well while it is reloaded in the background (stale-while-revalidate). Otherwise the value is loaded
+    synchronously and cached.
+    """
+    entry = cache.get_entry(key)
+    if entry is not None:
+        value, updated_at = entry
+        age = time.time() - updated_at
+        if age < ttl:
+            return value
+        if age < ttl + stale_ttl:
+            _refresh_in_background(cache, key, loader)
+            return value
+    value = loader()
+    cache.set(key, value)
+    return value
+
+
+def get_many_or_load(cache: 'PersistentCache', keys: dict, loader: Callable[[list], dict],
+                     keep: Callable[[Any, Any], bool] = lambda item, value: value is not None) -> dict:
+    """
+    Return values of items mapped to their cache keys. Cached values are read at once, the rest of the items are
+    passed to loader that returns a dictionary of their values. A loaded value is cached if keep(item, value) is True
+    (by default if it is not None), e.g. only values of finished items that can not change any more.
+    Items the loader did not return a value for are absent in the result.
+    """
+    cached = cache.get_many(keys.values())
+    values = {item: cached[key] for item, key in keys.items() if key in cached}
+    missing = [item for item in keys if item not in values]
+    if not missing:
+        return values
+    loaded = loader(missing)
+    cache.set_many({keys[item]: value for item, value in loaded.items() if item in keys and keep(item, value)})
+    values.update(loaded)
+    return values
+
+
+def load_each(func: Callable[[Any], Any]) -> Callable[[list], dict]:
+    """Make a loader for get_many_or_load that calls the function for every missing item concurrently."""
+    return lambda items: dict(zip(items, run_concurrently(func, items)))
+
+
+def _refresh_in_background(cache: 'PersistentCache', key: str, loader: Callable[[], Any]) -> None:
+    """Reload a cached value in a background thread unless it is already being reloaded."""
+    with _REFRESHING_LOCK:
+        if (cache.path, key) in _REFRESHING:
+            return
+        _REFRESHING.add((cache.path, key))
+
+    def refresh():
+        try:
+            cache.set(key, loader())
+        except Exception as err:  # pylint: disable=broad-except
+            print(f'Failed to refresh the cached value "{key}":', err)
+        finally:
+            with _REFRESHING_LOCK:
+                _REFRESHING.discard((cache.path, key))
+
+    threading.Thread(target=refresh, daemon=True).start()
+
+
+class PersistentCache:
+    """
+    A thread-safe key-value cache stored in a SQLite file. Values are serialized to JSON.
+
+    Attributes
+        path: str
+            path to the SQLite file with cached values
+    """
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        # Size of serialized values, counted on the first trim and kept up to date by writes
+        self._size = None
+        with self._lock, self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, updated_at REAL)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS cache_updated_at ON cache (updated_at)')
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a cached value or default if the key is absent."""
+        return self.get_many([key]).get(key, default)
+
+    def get_many(self, keys: Iterable[str]) -> dict:
+        """Return a dictionary with cached values for the keys that are present in the cache."""
+        keys = list(keys)
+        result = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                block = keys[i:i + 500]
+                rows = self._connection.execute(
+                    f'SELECT key, value FROM cache WHERE key IN ({", ".join("?" * len(block))})', block).fetchall()
+                result.update({key: json.loads(value) for key, value in rows})
+        return result
+
+    def get_entry(self, key: str) -> Optional[tuple[Any, float]]:
+        """Return a cached value with the time (Unix seconds) it was stored at or None if the key is absent."""
+        with self._lock:
+            row = self._connection.execute('SELECT value, updated_at FROM cache WHERE key = ?', (key,)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value in the cache."""
+        self.set_many({key: value})
+
+    def set_many(self, items: dict) -> None:
+        """Store several values in the cache at once."""
+        if not items:
+            return
+        now = time.time()
+        rows = [(key, json.dumps(value), now) for key, value in items.items()]
+        with self._lock, self._connection:
+            self._connection.executemany('INSERT OR REPLACE INTO cache (key, value, updated_at) VALUES (?, ?, ?)', rows)
+            if self._size is not None:
+                # Replaced values are not subtracted, so the size can only be overestimated until the next trim
+                self._size += sum(len(value) for _, value, _ in rows)
+
+    def touch(self, key: str) -> None:
+        """Mark a value as recently used, so it is evicted after less recently used values."""
+        with self._lock, self._connection:
+            self._connection.execute('UPDATE cache SET updated_at = ? WHERE key = ?', (time.time(), key))
+
+    def trim(self, max_size: int) -> None:
+        """
+        Evict least recently stored or touched values if serialized values take more than max_size bytes, until
+        they take at most TRIM_RATIO of it. The size is tracked on writes, so the check itself is cheap.
+        """
+        with self._lock, self._connection:
+            if self._size is None:
+                self._size = self._get_size()
+            if self._size <= max_size:
+                return
+            self._connection.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM (SELECT key, SUM(LENGTH(value)) OVER '
+                '(ORDER BY updated_at DESC, key) AS total_size FROM cache) WHERE total_size > ?)',
+                (int(max_size * TRIM_RATIO),))
+            self._size = self._get_size()
+
+    def _get_size(self) -> int:
+        """Count the size of all serialized values (the caller holds the lock)."""
+        return self._connection.execute('SELECT COALESCE(SUM(LENGTH(value)), 0) FROM cache').fetchone()[0]
@@ -0,0 +1,16 @@
+"""This module contains helpers to run I/O bound functions concurrently."""
+
+import concurrent.futures
+from typing import Callable, Iterable
+
+
+MAX_WORKERS = 8
+
+
+def run_concurrently(func: Callable, items: Iterable, max_workers: int = MAX_WORKERS) -> list:
+    """Call a function for every item in a thread pool and return the results in the order of the items."""
+    items = list(items)
+    if not items:
+        return []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(func, items))
@@ -0,0 +1,97 @@
+"""This module calculates commits sizes from local mirrors of git repositories."""
+
+import base64
+import concurrent.futures
+import os
+import subprocess
+import tempfile
+
+from typing import Optional
+
+
+MAX_PROCESSES = 4
+
+
+def basic_auth_header(user: str, token: str) -> str:
+    """Create an HTTP Basic Authorization header for git requests."""
+    credentials = base64.b64encode(f'{user}:{token}'.encode('utf-8')).decode('ascii')
+    return f'Authorization: Basic {credentials}'
+
+
+def update_mirror(remote_url: str, mirror_path: str, auth_header: Optional[str] = None) -> None:
+    """Clone a bare mirror of a repository or fetch new objects into the existing mirror."""
+    if os.path.isdir(mirror_path):
+        _run_git(['-C', mirror_path, 'remote', 'update', '--prune'], auth_header)
+    else:
+        os.makedirs(os.path.dirname(mirror_path) or '.', exist_ok=True)
+        _run_git(['clone', '--mirror', '--quiet', remote_url, mirror_path], auth_header)
+
+
+def _run_git(args: list[str], auth_header: Optional[str] = None) -> None:
+    """Run a git command. The authorization header is passed through the environment, not the command line."""
+    env = dict(os.environ, GIT_TERMINAL_PROMPT='0')
+    if auth_header:
+        env.update({'GIT_CONFIG_COUNT': '1', 'GIT_CONFIG_KEY_0': 'http.extraHeader', 'GIT_CONFIG_VALUE_0': auth_header})
+    subprocess.run(['git', *args], env=env, check=True, capture_output=True)
+
+
+def get_commits_sizes(repo_path: str, since_date: Optional[str] = None) -> list[list]:
+    """
+    Get sizes (inserted plus deleted lines) of all non-merge commits of the repository HEAD in one pass of
+    'git log --numstat'. Root commits are compared with the empty tree. Binary files do not add lines.
+    Returns a list of [commit id, commit size] pairs, the size is None for commits without changes.
+    Raises subprocess.CalledProcessError if git fails (e.g. the mirror is absent or has no commits).
+    """
+    cmd = ['git', '-C', repo_path, 'log', '--no-merges', '--numstat', '--format=commit %H']
+    if since_date:
+        cmd.append(f'--since={since_date}')
+    commits_sizes = []
+    # stderr goes to a file, so git cannot block on a full pipe while stdout is read
+    with tempfile.TemporaryFile() as stderr:
+        with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr,
+                              encoding='utf-8', errors='replace') as process:
+            for line in process.stdout:
+                if line.startswith('commit '):
+                    commits_sizes.append([line[7:].strip(), None])
+                elif line.strip() and commits_sizes:
+                    insertions, deletions, _ = line.split('\t', 2)
+                    size = (int(insertions) if insertions.isdigit() else 0) + \
+                           (int(deletions) if deletions.isdigit() else 0)
+                    commits_sizes[-1][1] = (commits_sizes[-1][1] or 0) + size
+        if process.returncode:
+            stderr.seek(0)
+            raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr.read())
+    return commits_sizes
+
+
+def _mirror_and_get_commits_sizes(args: tuple) -> list[list]:
+    """Update a mirror and get its commits sizes (runs in a worker process)."""
+    remote_url, mirror_path, since_date, auth_header = args
+    try:
+        if remote_url:
+            update_mirror(remote_url, mirror_path, auth_header)
+    except subprocess.CalledProcessError as err:
+        print(f'Failed to update the mirror "{mirror_path}":', err.stderr.decode('utf-8', errors='replace'))
+        if not os.path.isdir(mirror_path):
+            return []
+    try:
+        return get_commits_sizes(mirror_path, since_date)
+    except subprocess.CalledProcessError as err:
+        print(f'Failed to read commits of the mirror "{mirror_path}":', err.stderr.decode('utf-8', errors='replace'))
+        return []
+
+
+def get_commits_sizes_for_repos(mirrors: dict[str, Optional[str]], since_date: Optional[str] = None,
+                                auth_header: Optional[str] = None, max_processes: int = MAX_PROCESSES) -> list[list]:
+    """
+    Get commits sizes of several repositories processing them in parallel worker processes.
+
+    mirrors: dict
+        local mirror paths mapped to remote URLs to update the mirrors from (None to use a mirror as it is)
+    """
+    tasks = [(remote_url, mirror_path, since_date, auth_header) for mirror_path, remote_url in mirrors.items()]
+    if not tasks:
+        return []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(max_processes, len(tasks))) as executor:
+        results = executor.map(_mirror_and_get_commits_sizes, tasks)
+        return [commit_size for result in results for commit_size in result]
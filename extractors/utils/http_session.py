@@ -0,0 +1,45 @@
+"""This module creates HTTP sessions with connection pools that can be shared by concurrent requests."""
+
+import hashlib
+import threading
+
+from typing import Optional
+
+import requests
+
+from requests.adapters import HTTPAdapter
+
+
+POOL_SIZE = 32
+_SESSIONS = {}
+_BUDGETS = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def create_session(pool_size: int = POOL_SIZE) -> requests.Session:
+    """Create a requests session that keeps up to pool_size connections open per host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def credential_hash(credential: Optional[str]) -> str:
+    """Get a short hash of a credential to refer to it in keys and logs without revealing it."""
+    return hashlib.sha256((credential or '').encode('utf-8')).hexdigest()[:16]
+
+
+def get_shared_resources(session_key: tuple, budget_key: tuple,
+                         concurrency: int) -> tuple[requests.Session, threading.BoundedSemaphore]:
+    """
+    Get a pooled session and a concurrency budget shared by all callers in the process with the same keys.
+    The session key should include the credential, so cookies of one credential are never sent with another one.
+    The budget limits the number of requests sent at the same time by all sessions with the same budget key.
+    """
+    with _SHARED_LOCK:
+        if session_key not in _SESSIONS:
+            _SESSIONS[session_key] = create_session(concurrency)
+        if budget_key not in _BUDGETS:
+            _BUDGETS[budget_key] = threading.BoundedSemaphore(concurrency)
+        return _SESSIONS[session_key], _BUDGETS[budget_key]
@@ -1,48 +1,43 @@
-"""This module transforms DataFrames with data extracted from Azure DevOps."""
+"""This module transforms DataFrames with extracted data."""
 
 from typing import Optional
 
 import pandas as pd
 
-from ..utils.convert_to_datetime import string_to_datetime
-
 
 def waiting_time_for_jobs_in_pipeline(df_runs: pd.DataFrame) -> pd.DataFrame:
-    """Add calculated waiting time between  jobs in pipelines to a Data Frame."""
+    """
+    Add calculated waiting time between jobs in pipelines to a Data Frame.
+
+    For the first job in a pipeline run the waiting time is the time between the run creation and the job start.
+    For the rest of the jobs it is the time between the previous job finish and the job start. In case some job starts
+    before the previous job finishes (or there is no previous finish time), the waiting time is the time between
+    the run creation and the job start.
+    """
     df_sorted = df_runs.sort_values(by=['run_id', 'job_start_time'], ignore_index=True)
-    df_sorted['jobs_seq_num'] = df_sorted.groupby('run_id').cumcount() + 1
-
-    df_sorted['job_finish_time_previous'] = df_sorted['job_finish_time'].shift(+1)
-    df_sorted['waiting time'] = df_sorted.apply(lambda x: get_time_between(x['jobs_seq_num'],
-                                                                           x['job_start_time'],
-                                                                           x['job_finish_time_previous'],
-                                                                           x['run_created_date']), axis=1)
-    return df_sorted.drop(columns=['job_finish_time_previous', 'jobs_seq_num'])
-
-
-def get_time_between(job_seq_num: int, job_start_time: str, job_finish_time_previous: str,
-                     run_created_date: str) -> float:
-    """Calculate waiting time for jobs in pipelines."""
-    time_diff_start_finish = calculate_time_difference(job_start_time, job_finish_time_previous)
-    time_diff_created_start = calculate_time_difference(job_start_time, run_created_date)
-    if job_seq_num == 1:
-        # For the first job in a pipeline run the waiting time is the time between the run creation and the job start
-        waiting_time = time_diff_created_start
-    else:
-        # For the rest of the jobs in a pipeline run the waiting time is the time between the previous job finish
-        waiting_time = time_diff_start_finish
-
-    # In case some job starts before the previous job finishes, the waiting time is the time between the run creation
-    # and the job start
-    if waiting_time is None or waiting_time < 0:
-        return time_diff_created_start
-
-    return waiting_time
-
-
-def calculate_time_difference(next_date: str, previous_date: str) -> Optional[float]:
-    """Calculate the time difference between two dates in minutes."""
-    try:
-        return round((string_to_datetime(next_date) - string_to_datetime(previous_date)).total_seconds() / 60, 2)
-    except TypeError:
-        return None
+    job_start_time = strings_to_datetime(df_sorted['job_start_time'])
+    run_created_date = strings_to_datetime(df_sorted['run_created_date'])
+    job_finish_time_previous = strings_to_datetime(df_sorted['job_finish_time']).groupby(df_sorted['run_id']).shift(1)
+    is_first_job = df_sorted.groupby('run_id').cumcount() == 0
+
+    time_diff_created_start = minutes_between(job_start_time, run_created_date)
+    time_diff_start_finish = minutes_between(job_start_time, job_finish_time_previous)
+    waiting_time = time_diff_start_finish.mask(is_first_job, time_diff_created_start)
+    df_sorted['waiting time'] = waiting_time.where(waiting_time >= 0, time_diff_created_start)
+    return df_sorted
+
+
+def strings_to_datetime(dates: pd.Series) -> pd.Series:
+    """Takes first 19 symbols of every string in a Series and converts them to datetime (NaT for missing values)."""
+    return pd.to_datetime(dates.str[:19].str.replace('T', ' ', regex=False), errors='coerce')
+
+
+def minutes_between(next_dates: pd.Series, previous_dates: pd.Series) -> pd.Series:
+    """Calculate the time difference between two datetime Series in minutes."""
+    return ((next_dates - previous_dates).dt.total_seconds() / 60).round(2)
+
+
+def concat_results(results: list[Optional[pd.DataFrame]]) -> pd.DataFrame:
+    """Concatenate results of several projects or repositories skipping the ones without data."""
+    results = [df for df in results if df is not None and not df.empty]
+    return pd.concat(results, axis=0) if results else pd.DataFrame()
@@ -12,6 +12,7 @@ from ..extractors.ado.main import (
     get_commits_several_projects,
     get_merge_requests_several_projects,
     get_pipelines_runs_several_projects,
+    get_iterations_several_projects,
 )
 
 
@@ -49,6 +50,7 @@ class Method:
         created_after: str,
         project_keys: str,
         area: str = "",
+        incremental: bool = False,
     ) :
         """
         Get work items from multiple Azure DevOps projects.
@@ -65,6 +67,9 @@ class Method:
                 Comma-separated project names.
             area: str
                 Area path filter (optional).
+            incremental: bool
+                If True, statuses history is derived from the local store of revisions that downloads
+                only revisions made since the previous call (the first call downloads all revisions).
         """
         df_work_items = get_work_items_several_projects(
             project_keys,
@@ -73,6 +78,7 @@ class Method:
             created_after,
             area=area,
             ado_search=ado_search,
+            incremental=incremental,
         )
 
         csv_data = df_work_items.to_csv(index_label="id", index=False)
@@ -155,7 +161,7 @@ class Method:
         return csv_data, message
     
     @web.method()
-    def get_pipelines_runs(self, ado_search: AzureSearch, project_keys: str):
+    def get_pipelines_runs(self, ado_search: AzureSearch, project_keys: str, since_date: Optional[str] = None):
         """
         Get pipeline runs from multiple Azure DevOps projects.
 
@@ -163,8 +169,10 @@ class Method:
             Initialized AzureSearch client instance.
         project_keys: str
             Comma-separated project names.
+        since_date: str
+            Get pipeline runs queued after this date 'YYYY-MM-DD'.
         """
-        pipelines_df = get_pipelines_runs_several_projects(project_keys, ado_search=ado_search)
+        pipelines_df = get_pipelines_runs_several_projects(project_keys, since_date, ado_search=ado_search)
 
         csv_data = pipelines_df.to_csv(index=False)
 
@@ -175,4 +183,27 @@ class Method:
             log.info(f"Extracted pipeline runs DataFrame:\n{pipelines_df.head()}")
             message = f"Found {len(pipelines_df)} pipeline runs."
 
-        return csv_data, message
\ No newline at end of file
+        return csv_data, message
+
+    @web.method()
+    def get_iterations(self, ado_search: AzureSearch, project_keys: str):
+        """
+        Get iterations (sprints) of teams from multiple Azure DevOps projects.
+
+        ado_search: AzureSearch
+            Initialized AzureSearch client instance.
+        project_keys: str
+            Comma-separated project names.
+        """
+        iterations_df = get_iterations_several_projects(project_keys, ado_search=ado_search)
+
+        csv_data = iterations_df.to_csv(index=False)
+
+        if iterations_df.empty:
+            log.warning("No iterations found for the specified projects.")
+            message = "No iterations found for the specified projects."
+        else:
+            log.info(f"Extracted iterations DataFrame:\n{iterations_df.head()}")
+            message = f"Found {len(iterations_df)} iterations."
+
+        return csv_data, message
@@ -67,7 +67,7 @@ class Method:
     @web.method()
     def get_gitlab_commits(self, gitlab_search: GitLabV4Search, since_date: str, project_ids: str):
         """
-        Get commit data for specified GitLab project.
+        Get commit data for specified GitLab projects in one combined table.
 
         gitlab_search: GitLabV4Search
             GitLab search client.
@@ -94,7 +94,7 @@ class Method:
     @web.method()
     def get_gitlab_merge_requests(self, gitlab_search: GitLabV4Search, since_date: str, project_ids: str):
         """
-        Get merge requests for specified GitLab project.
+        Get merge requests for specified GitLab projects in one combined table.
 
         gitlab_search: GitLabV4Search
             GitLab search client.
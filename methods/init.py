@@ -3,9 +3,12 @@
 
 """ Initialization Methods """
 
+import os
 import time
 from pylon.core.tools import log, web
 
+from ..extractors.utils.cache import set_cache_folder
+
 
 class Method:
     """ Initialization methods """
@@ -22,6 +25,9 @@ class Method:
         log.info("Initializing plugin configuration")
         log.info(f"Configuration: {config}")
         
+        # Keep persistent caches of extracted data under the base path
+        set_cache_folder(os.path.join(config["base_path"], "cache"))
+
         # Store start time for health checks
         self.start_time = time.time()
         
@@ -82,7 +82,7 @@ class Route:
 
         github_parameters = {
             "owner": { "type": "String", "required": True, "description": "GitHub owner name" },
-            "token": { "type": "Secret", "required": True, "description": "GitHub personal access token" },
+            "token": { "type": "Secret", "required": True, "description": "GitHub personal access token (or several comma-separated tokens)" },
             "repos": { "type": "String", "required": False, "description": "Comma-separated list of GitHub"}
         }
 
@@ -150,7 +150,8 @@ class Route:
                         "updated_after": { "type": "String", "required": True, "description": "Date filter for updated items 'YYYY-MM-DD'." },
                         "created_after": { "type": "String", "required": True, "description": "Date filter for created items 'YYYY-MM-DD'." },
                         "project_keys": { "type": "String", "required": False, "description": "Comma-separated project names." },
-                        "area": { "type": "String", "required": False, "description": ("Area path filter for work items. " "(Optional, leave empty to search all areas).") }
+                        "area": { "type": "String", "required": False, "description": ("Area path filter for work items. " "(Optional, leave empty to search all areas).") },
+                        "incremental": { "type": "Bool", "required": False, "default_value": False, "description": ("Derive statuses history from a local store of revisions that downloads only new revisions. " "The first call downloads all revisions of the project.") }
                     },
                     "description": "Get work items from multiple Azure DevOps projects.",
                     "tool_metadata": _get_tool_metadata("ado_data"),
@@ -193,6 +194,17 @@ class Route:
                     "tool_result_type": "String",
                     "sync_invocation_supported": True,
                     "async_invocation_supported": False
+                },
+                {
+                    "name": "get_iterations",
+                    "args_schema": {
+                        "project_keys": { "type": "String", "required": False, "description": "Comma-separated project names." }
+                    },
+                    "description": "Get iterations (sprints) of teams from multiple Azure DevOps projects.",
+                    "tool_metadata": _get_tool_metadata("ado_data"),
+                    "tool_result_type": "String",
+                    "sync_invocation_supported": True,
+                    "async_invocation_supported": False
                 }
             ],
             "toolkit_metadata": {}
@@ -7,6 +7,8 @@ import time
 import datetime
 from pylon.core.tools import web
 
+from ..extractors.github.github_utils import get_rate_limit_metrics
+
 
 class Route:
     """ Health check route """
@@ -27,7 +29,10 @@ class Route:
                 "timestamp": datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S+00:00"),
                 "plugin": "DataExtractor",
                 "configuration": config,
-                "extra_info": {},
+                "extra_info": {
+                    # Remaining GitHub rate limits by token hash
+                    "github_rate_limits": get_rate_limit_metrics(),
+                },
             }
         except Exception as e:
             return {
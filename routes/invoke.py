@@ -183,7 +183,8 @@ class Route:
                         tool_params["updated_after"],
                         tool_params["created_after"],
                         project_keys=project_keys,
-                        area=area
+                        area=area,
+                        incremental=tool_params.get("incremental", False)
                     )
                 elif tool_name == "get_commits":
                     required_params = ["since_date"]
@@ -214,7 +215,11 @@ class Route:
 
                     project_keys = toolkit_params.get("project_keys") or tool_params.get("project_keys", "")
 
-                    result, message = self.get_pipelines_runs(ado_search, project_keys=project_keys)
+                    result, message = self.get_pipelines_runs(ado_search, project_keys=project_keys, since_date=tool_params["since_date"])
+                elif tool_name == "get_iterations":
+                    project_keys = toolkit_params.get("project_keys") or tool_params.get("project_keys", "")
+
+                    result, message = self.get_iterations(ado_search, project_keys=project_keys)
             elif toolkit_name == "GitLabDataExtractorToolkit":
                 base_url = toolkit_params.get("url")
                 token = toolkit_params.get("token")
@@ -0,0 +1,27 @@
+"""
+Compare the speed of the vectorized waiting time of pipeline jobs with the previous row-wise implementation.
+Run from the repository root: python tests/benchmark_transform.py [runs count]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest  # noqa: F401 pylint: disable=unused-import,wrong-import-position
+from test_transform import make_runs, reference_waiting_time_for_jobs_in_pipeline  # pylint: disable=wrong-import-position
+from extractors.utils.transform import waiting_time_for_jobs_in_pipeline  # pylint: disable=wrong-import-position
+
+
+def benchmark(func, df_runs) -> float:
+    """Return the time of one call in seconds."""
+    start = time.perf_counter()
+    func(df_runs.copy())
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    df = make_runs(int(sys.argv[1]) if len(sys.argv) > 1 else 60000)
+    print(f'{len(df)} jobs')
+    print(f'row-wise:   {benchmark(reference_waiting_time_for_jobs_in_pipeline, df):.2f}s')
+    print(f'vectorized: {benchmark(waiting_time_for_jobs_in_pipeline, df):.2f}s')
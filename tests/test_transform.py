@@ -0,0 +1,94 @@
+"""Check the vectorized waiting time of pipeline jobs against the previous row-wise implementation."""
+
+import random
+from datetime import datetime, timedelta
+from typing import Optional
+
+import pandas as pd
+import pytest
+
+from extractors.utils.convert_to_datetime import string_to_datetime
+from extractors.utils.transform import waiting_time_for_jobs_in_pipeline
+
+
+def reference_waiting_time_for_jobs_in_pipeline(df_runs: pd.DataFrame) -> pd.DataFrame:
+    """The previous row-wise implementation kept as a reference."""
+    df_sorted = df_runs.sort_values(by=['run_id', 'job_start_time'], ignore_index=True)
+    df_sorted['jobs_seq_num'] = df_sorted.groupby('run_id').cumcount() + 1
+
+    df_sorted['job_finish_time_previous'] = df_sorted['job_finish_time'].shift(+1)
+    df_sorted['waiting time'] = df_sorted.apply(lambda x: reference_get_time_between(x['jobs_seq_num'],
+                                                                                     x['job_start_time'],
+                                                                                     x['job_finish_time_previous'],
+                                                                                     x['run_created_date']), axis=1)
+    return df_sorted.drop(columns=['job_finish_time_previous', 'jobs_seq_num'])
+
+
+def reference_get_time_between(job_seq_num: int, job_start_time: str, job_finish_time_previous: str,
+                               run_created_date: str) -> float:
+    """The previous rules: the first job waits from the run creation, the rest from the previous job finish."""
+    time_diff_start_finish = reference_calculate_time_difference(job_start_time, job_finish_time_previous)
+    time_diff_created_start = reference_calculate_time_difference(job_start_time, run_created_date)
+    if job_seq_num == 1:
+        waiting_time = time_diff_created_start
+    else:
+        waiting_time = time_diff_start_finish
+
+    # An overlapping job (or a job without the previous finish time) waits from the run creation
+    if waiting_time is None or waiting_time < 0:
+        return time_diff_created_start
+
+    return waiting_time
+
+
+def reference_calculate_time_difference(next_date: str, previous_date: str) -> Optional[float]:
+    """Calculate the time difference between two dates in minutes."""
+    try:
+        return round((string_to_datetime(next_date) - string_to_datetime(previous_date)).total_seconds() / 60, 2)
+    except TypeError:
+        return None
+
+
+def make_runs(runs_count: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate pipeline runs with several jobs each. Some jobs overlap with the previous one and some have no start
+    or finish time.
+    """
+    rnd = random.Random(seed)
+    base = datetime(2024, 1, 1)
+    rows = []
+    for run_id in range(runs_count):
+        created = base + timedelta(minutes=rnd.randint(0, 100000), seconds=rnd.randint(0, 59))
+        start = created
+        for job in range(rnd.randint(1, 6)):
+            start += timedelta(seconds=rnd.randint(-300, 900))
+            finish = start + timedelta(seconds=rnd.randint(0, 1200))
+            rows.append({
+                'run_id': run_id,
+                'run_created_date': created.strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+                'job name': f'job {job}',
+                'job_start_time': None if rnd.random() < 0.05 else start.strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+                'job_finish_time': None if rnd.random() < 0.05 else finish.strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+            })
+    return pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_waiting_time_matches_reference(seed):
+    df_runs = make_runs(300, seed)
+    expected = reference_waiting_time_for_jobs_in_pipeline(df_runs.copy())
+    result = waiting_time_for_jobs_in_pipeline(df_runs.copy())
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_waiting_time_rules():
+    df_runs = pd.DataFrame({
+        'run_id': [1, 1, 1, 2],
+        'run_created_date': ['2024-01-01T10:00:00Z'] * 3 + ['2024-01-01T12:00:00Z'],
+        'job_start_time': ['2024-01-01T10:01:00Z', '2024-01-01T10:05:00Z', '2024-01-01T10:06:00Z',
+                           '2024-01-01T12:03:00Z'],
+        'job_finish_time': ['2024-01-01T10:04:00Z', '2024-01-01T10:10:00Z', None, '2024-01-01T12:04:00Z'],
+    })
+    result = waiting_time_for_jobs_in_pipeline(df_runs)
+    # First job, a job after the previous finish, an overlapping job and the first job of another run
+    assert result['waiting time'].tolist() == [1.0, 1.0, 6.0, 3.0]